@@ -1,114 +1,211 @@
 """
 Streamlit GUI application for managing CrewAI content generation workflows.
+Generation runs in the worker pool (`python -m crew.worker`); the UI submits jobs
+to the shared job queue and polls their progress, so it never blocks on a crew.
+The post is shown while it is being written. Set JOB_QUEUE=off to run the
+pipeline inline instead. Before generating, posts on nearly the same topic are
+looked up in the history store and offered for reuse or adaptation.
 """
 
 import streamlit as st
-from crewai import Agent, Task, Crew, Process
 from constants.content_requirements import (
     Platform,
     ExpertiseLevel,
 )
-from typing import Dict, Any
-from streamlit.components.v1 import html
-from utils.linkedin_preview import LinkedInPreviewGenerator
+from crew.history import get_history_store
+from crew.job_queue import DONE, FAILED, get_job_queue
+from utils.preview_renderer import render_preview
 import os
-from crew.agents.image_designer import get_image_designer_agent
-from crew.tasks.image_designing import image_design_task
-from crew.tasks.research import research_task
-from crew.tasks.writing import create_writing_task
-from crew.agents.researcher import get_researcher_agent
-from crew.agents.writer import get_writer_agent
-
-def initialize_crew(topic: str, platform: Platform, expertise_level: ExpertiseLevel) -> Dict[str, Any]:
-    """Initialize and run the CrewAI workflow with given parameters."""
-    research_agent = get_researcher_agent()
-    writer_agent = get_writer_agent()
-    
-    writing_task = create_writing_task(
-        platform=platform,
-        expertise_level=expertise_level,
-        writer_agent=writer_agent
-    )
-    
-    crew = Crew(
-        agents=[research_agent, writer_agent],
-        tasks=[research_task, writing_task],
-        process=Process.sequential,
-        verbose=True
-    )
-    
-    return crew.kickoff(
-        inputs={
-            "topic": topic,
-            "expertise_level": expertise_level.value,
-            "social_platform": platform.value
-        }
-    )
+import queue
+import threading
+
+STAGE_ICONS = {"started": "⏳", "done": "✅", "failed": "❌"}
+
+@st.cache_resource
+def get_warm_agent_pool():
+    """Process-wide agent pool, built once and shared by every session and rerun."""
+    from crew.agent_pool import get_agent_pool
+    return get_agent_pool().warm()
+
+def queue_enabled() -> bool:
+    return os.getenv("JOB_QUEUE", "on").lower() not in ("off", "0", "false")
+
+def _existing(image_path: str) -> list:
+    return [image_path] if image_path and os.path.exists(image_path) else None
+
+def show_preview(platform: str, content: str, image_paths: list, preview_col):
+    preview = render_preview(Platform(platform), content=content,
+                             image_paths=[p for p in image_paths if p and os.path.exists(p)] or None)
+    with preview_col:
+        st.title("Preview")
+        st.components.v1.html(preview, height=1200, width=1000)
+
+def show_result(platform: str, output: dict, preview_col):
+    st.success("Content generated successfully!")
+    st.text_area("Generated Content", output["content"], height=800)
+    digest = output.get("digest")
+    if digest and digest.get("tokens_saved"):
+        st.caption(f"Research digest: {digest['digest_tokens']} of {digest['original_tokens']} tokens "
+                   f"sent to the writer (~{digest['tokens_saved']} saved)")
+    show_preview(platform, output["content"], output.get("image_paths") or [output.get("image_path")], preview_col)
+    if output.get("slide_paths"):
+        st.image(output["slide_paths"], width=180, caption=[f"Slide {i}" for i in range(1, len(output["slide_paths"]) + 1)])
+
+@st.fragment(run_every=2)
+def job_progress(job_id: str):
+    """Poll the job queue and show per-stage status until the job finishes."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.error("Job not found.")
+        return
+    if job.finished:
+        # Rerun the whole page once so the result is rendered outside the polling fragment.
+        st.rerun()
+
+    st.info("Waiting for a worker..." if job.status == "queued" else "Generating content...")
+    for stage, status in job.stages.items():
+        st.write(f"{STAGE_ICONS.get(status, '•')} {stage}: {status}")
+
+    content = job.partial.get("content", "")
+    if content:
+        st.text_area("Generated Content (in progress)", content, height=800)
+        # Columns can't be entered from inside a fragment, so the live preview sits below the text.
+        st.components.v1.html(
+            render_preview(Platform(job.platform), content=content, image_paths=_existing(job.partial.get("image_path"))),
+            height=1200
+        )
+
+def run_inline(topic: str, platform: str, expertise: str, preview_col, research: str = None):
+    """Run the pipeline on a background thread and show the post as it streams in."""
+    # Imported here so the page renders before CrewAI and the agents load.
+    from crew.pipeline import run_pipeline
+
+    get_warm_agent_pool()
+    deltas: queue.Queue = queue.Queue()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["output"] = run_pipeline(
+                topic=topic,
+                platform=Platform(platform),
+                expertise_level=ExpertiseLevel(expertise),
+                on_token=deltas.put,
+                research=research
+            )
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            deltas.put(None)
+
+    threading.Thread(target=run, name="inline-pipeline", daemon=True).start()
+    placeholder = st.empty()
+    text = ""
+    with st.spinner("Generating content..."):
+        while True:
+            delta = deltas.get()
+            if delta is None:
+                break
+            text += delta
+            # Drain whatever else arrived so the placeholder is redrawn once per batch.
+            while not deltas.empty():
+                delta = deltas.get_nowait()
+                if delta is None:
+                    deltas.put(None)
+                    break
+                text += delta
+            placeholder.markdown(text)
+    placeholder.empty()
+
+    if "error" in outcome:
+        st.error(f"Error generating content: {str(outcome['error'])}")
+    else:
+        show_result(platform, outcome["output"], preview_col)
+
+def start_generation(topic: str, platform: str, expertise: str, preview_col, research: str = None) -> bool:
+    """Queue the job, or run it inline when the queue is off. Returns True when the result is already shown."""
+    st.session_state.pop("pending", None)
+    st.session_state.pop("reused_id", None)
+    if not queue_enabled():
+        run_inline(topic, platform, expertise, preview_col, research)
+        return True
+    st.session_state["job_id"] = get_job_queue().submit(topic, platform, expertise, research)
+    return False
+
+def offer_matches(preview_col) -> bool:
+    """Show stored posts similar to the pending request. Returns True while the user has not chosen."""
+    topic, platform, expertise, match_ids = st.session_state["pending"]
+    history = get_history_store()
+    matches = [post for post in (history.get(post_id) for post_id in match_ids) if post is not None]
+    st.warning("Similar posts were generated before. Reuse one, adapt its research, or generate from scratch.")
+    for post in matches:
+        with st.expander(f"{post.topic} · {post.platform.title()} · {post.expertise_level.title()}"):
+            st.text(post.content[:500])
+            reuse, adapt = st.columns(2)
+            if post.platform == platform and reuse.button("Reuse this post", key=f"reuse-{post.id}"):
+                st.session_state.pop("pending", None)
+                st.session_state.pop("job_id", None)
+                st.session_state["reused_id"] = post.id
+                return False
+            # Posts stored before raw findings were kept only have the digest for their own platform.
+            research = post.research or post.research_digest
+            if research and adapt.button("Adapt its research", key=f"adapt-{post.id}"):
+                return start_generation(topic, platform, expertise, preview_col, research=research)
+    if st.button("Generate new content"):
+        return start_generation(topic, platform, expertise, preview_col)
+    return True
 
 def main():
     col1, col2 = st.columns([1, 1])
-    
+
     with col1:
         st.title("Social Media Content Generator")
-        
+
         # Input fields
         topic = st.text_input("Topic", "trading crude oil futures")
-        
+
         platform = st.selectbox(
             "Platform",
             options=[p.value for p in Platform],
             format_func=lambda x: x.title()
         )
-        
+
         expertise = st.selectbox(
             "Expertise Level",
             options=[e.value for e in ExpertiseLevel],
             format_func=lambda x: x.title()
         )
-        
+
         if st.button("Generate Content"):
-            with st.spinner("Generating content..."):
-                try:
-                    result = initialize_crew(
-                        topic=topic,
-                        platform=Platform(platform),
-                        expertise_level=ExpertiseLevel(expertise)
-                    )
-                    
-                    # Generate image
-                    image_crew = Crew(
-                        agents=[get_image_designer_agent()],
-                        tasks=[image_design_task],
-                        process=Process.sequential
-                    )
-                    
-                    image_result = image_crew.kickoff(inputs={
-                        "topic": topic,
-                        "expertise_level": expertise,
-                        "social_platform": platform,
-                        "content": result
-                    })
-                    
-                    st.success("Content generated successfully!")
-                    st.text_area("Generated Content", result, height=800)
-                    
-                    # Move preview generation inside try block
-                    if platform == Platform.LINKEDIN.value:
-                        # Parse single image path from TaskOutput
-                        image_path = image_result.raw.strip()
-                        if image_path.startswith('- '):
-                            image_path = image_path[2:]
-                        
-                        preview = LinkedInPreviewGenerator().generate_preview(
-                            content=result,
-                            image_paths=[image_path] if os.path.exists(image_path) else None
-                        )
-                        with col2:
-                            st.title("Preview")
-                            st.components.v1.html(preview, height=1200, width=1000)
-                            
-                except Exception as e:
-                    st.error(f"Error generating content: {str(e)}")
+            history = get_history_store()
+            matches = history.find_similar(topic, Platform(platform), ExpertiseLevel(expertise)) if history else []
+            if matches:
+                st.session_state.pop("job_id", None)
+                st.session_state.pop("reused_id", None)
+                st.session_state["pending"] = (topic, platform, expertise, [m.post.id for m in matches])
+            elif start_generation(topic, platform, expertise, col2):
+                return
+
+        if "pending" in st.session_state and offer_matches(col2):
+            return
+
+        reused_id = st.session_state.get("reused_id")
+        if reused_id is not None:
+            post = get_history_store().get(reused_id)
+            if post is not None:
+                show_result(post.platform, post.as_result(), col2)
+            return
+
+        job_id = st.session_state.get("job_id")
+        if job_id is None:
+            return
+        job = get_job_queue().get(job_id)
+        if job is None or not job.finished:
+            job_progress(job_id)
+        elif job.status == FAILED:
+            st.error(f"Error generating content: {job.error}")
+        elif job.status == DONE:
+            show_result(job.platform, job.result, col2)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,249 @@
+"""
+End-to-end benchmark of the generation pipeline against local stand-ins.
+Runs `initialize_crew`, the image crew and `LinkedInPreviewGenerator` stage by
+stage, then the full stage graph at several concurrency levels, with the LLM,
+search and image APIs replaced by fakes with injectable latency (see
+`benchmarks.fakes`). Reports per-stage latency percentiles, jobs per second,
+peak memory and import time as JSON; `--baseline` compares against an earlier
+report and exits non-zero on regressions.
+
+Usage:
+    python -m benchmarks.e2e --jobs 16 --concurrency 1 4 8 --llm-latency-ms 200 --output e2e.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_MODULES = ["crew.pipeline", "utils.preview_renderer", "app"]
+TOPIC = "trading crude oil futures"
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"n": len(ordered), "p50_ms": at(0.5), "p90_ms": at(0.9), "p99_ms": at(0.99),
+            "max_ms": round(ordered[-1] * 1000, 2), "mean_ms": round(statistics.fmean(ordered) * 1000, 2)}
+
+
+def configure(args: argparse.Namespace, workdir: str) -> None:
+    """Point every external dependency at a local stand-in and turn off caches."""
+    os.environ.update({
+        "SEARCH_BACKEND": "fixture",
+        "SEARCH_FIXTURE_LATENCY_MS": str(args.search_latency_ms),
+        "RESEARCH_CACHE": "off",
+        "LLM_CACHE_MODE": "off",
+        "AGENT_MEMORY": "none",
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "HISTORY_PATH": os.path.join(workdir, "history.sqlite3"),
+        "PREVIEW_TEMPLATE_CACHE": os.path.join(workdir, "jinja"),
+    })
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT"] = "off"
+
+    from benchmarks.fakes import FakeImageTool, FakeLLM
+    from crew.agent_pool import AgentPool, set_agent_pool
+    from crew.agents.image_designer import get_image_designer_agent
+    from crew.agents.researcher import get_researcher_agent
+    from crew.agents.writer import get_writer_agent
+    from crew.llm import set_llm_factory
+
+    llm_latency_s = args.llm_latency_ms / 1000
+    set_llm_factory(lambda: FakeLLM(latency_s=llm_latency_s, jitter_s=llm_latency_s * args.jitter))
+    image_tool = FakeImageTool(output_dir=os.path.join(workdir, "img"), latency_s=args.image_latency_ms / 1000)
+    set_agent_pool(AgentPool({
+        "researcher": get_researcher_agent,
+        "writer": get_writer_agent,
+        "image_designer": lambda: get_image_designer_agent(image_tool=image_tool),
+    }))
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def bench_stages(jobs: int) -> Dict[str, Any]:
+    """Run the public entry points one after another and time each of them."""
+    from constants.content_requirements import ExpertiseLevel, Platform
+    from crew.pipeline import generate_image, initialize_crew, parse_image_path
+    from utils.linkedin_preview import LinkedInPreviewGenerator
+
+    preview = LinkedInPreviewGenerator()
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(jobs):
+        output, elapsed = _timed(lambda: initialize_crew(TOPIC, Platform.LINKEDIN, ExpertiseLevel.BEGINNER))
+        samples["initialize_crew"].append(elapsed)
+        image, elapsed = _timed(lambda: generate_image(TOPIC, Platform.LINKEDIN, ExpertiseLevel.BEGINNER, ""))
+        samples["image_crew"].append(elapsed)
+        image_path = parse_image_path(image)
+        _, elapsed = _timed(lambda: preview.generate_preview(str(output), [image_path] if os.path.exists(image_path) else []))
+        samples["linkedin_preview"].append(elapsed)
+    return {stage: percentiles(values) for stage, values in samples.items()}
+
+
+def bench_throughput(jobs: int, concurrency: int) -> Dict[str, Any]:
+    """Run `jobs` full pipelines with `concurrency` in flight; per-stage latencies come from the scheduler."""
+    from constants.content_requirements import ExpertiseLevel, Platform
+    from crew.pipeline import run_multi_platform
+
+    platforms = list(Platform)
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    job_samples: List[float] = []
+    failures = 0
+
+    def run(index: int) -> Optional[Dict[str, Any]]:
+        target = (platforms[index % len(platforms)], ExpertiseLevel.INTERMEDIATE)
+        try:
+            output, elapsed = _timed(lambda: run_multi_platform(f"{TOPIC} #{index}", [target]))
+        except Exception:
+            return None
+        job_samples.append(elapsed)
+        return output
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        outputs = list(executor.map(run, range(jobs)))
+    elapsed = time.perf_counter() - started
+
+    for output in outputs:
+        if output is None:
+            failures += 1
+            continue
+        for stage, (begin, end) in output["timings"].items():
+            stage_samples[stage.split(":", 1)[0]].append(end - begin)
+    return {
+        "concurrency": concurrency,
+        "jobs": jobs,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_s": round((jobs - failures) / elapsed, 3) if elapsed else 0.0,
+        "job_latency": percentiles(job_samples),
+        "stages": {stage: percentiles(values) for stage, values in sorted(stage_samples.items())},
+    }
+
+
+def measure_imports(repeat: int) -> Dict[str, Any]:
+    from benchmarks.startup import measure_import
+
+    return {module: measure_import(module, repeat) for module in IMPORT_MODULES}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of `report` against `baseline`: p50 latencies more than `tolerance`
+    slower or throughput more than `tolerance` lower, at matching concurrency levels.
+    """
+    regressions: List[str] = []
+
+    def check_latency(name: str, current: Dict[str, float], previous: Dict[str, float]) -> None:
+        if current.get("p50_ms") and previous.get("p50_ms") and current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_ms']}ms -> {current['p50_ms']}ms")
+
+    for stage, stats in report.get("stages", {}).items():
+        check_latency(f"stage {stage}", stats, baseline.get("stages", {}).get(stage, {}))
+    previous_runs = {run["concurrency"]: run for run in baseline.get("throughput", [])}
+    for run in report.get("throughput", []):
+        previous = previous_runs.get(run["concurrency"])
+        if previous is None:
+            continue
+        if run["jobs_per_s"] < previous["jobs_per_s"] * (1 - tolerance):
+            regressions.append(f"throughput x{run['concurrency']}: {previous['jobs_per_s']} -> {run['jobs_per_s']} jobs/s")
+        for stage, stats in run["stages"].items():
+            check_latency(f"x{run['concurrency']} {stage}", stats, previous["stages"].get(stage, {}))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against local stand-ins.")
+    parser.add_argument("--jobs", type=int, default=12, help="Jobs per concurrency level")
+    parser.add_argument("--stage-jobs", type=int, default=5, help="Jobs for the stage-by-stage run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--search-latency-ms", type=float, default=150)
+    parser.add_argument("--image-latency-ms", type=float, default=1000)
+    parser.add_argument("--jitter", type=float, default=0.2, help="LLM latency jitter as a fraction of the latency")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the provider rate limiters on")
+    parser.add_argument("--import-repeat", type=int, default=3)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report peak Python allocations (tracemalloc slows the run down)")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Imports are measured first, in fresh interpreters, before this process loads anything.
+        imports = measure_imports(args.import_repeat)
+        configure(args, workdir)
+
+        if args.trace_memory:
+            tracemalloc.start()
+        stages = bench_stages(args.stage_jobs)
+        throughput = [bench_throughput(args.jobs, level) for level in args.concurrency]
+        memory: Dict[str, float] = {}
+        if args.trace_memory:
+            memory["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+
+    from utils.rate_limit import rate_limit_stats
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report = {
+        "revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "imports": imports,
+        "stages": stages,
+        "throughput": throughput,
+        "memory": {
+            "max_rss_mb": round(max_rss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 2),
+            **memory,
+        },
+        "rate_limits": rate_limit_stats(),
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        status = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Local stand-ins for the LLM and image APIs used by the end-to-end benchmark.
+They keep CrewAI, the agent pool, the rate limiter, the image store and the
+pipeline stages in the loop and only replace the network round trip with an
+injectable sleep. Search uses the existing `FixtureBackend`.
+"""
+
+import base64
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List
+from crew.llm import StreamingLLM
+from crew.streaming import current_token_sink
+from tools.image_generation.image_gen import ImageGenerationTool
+from utils.rate_limit import get_rate_limiter
+
+# 1x1 PNG used when Pillow is not installed.
+_TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+_TOOL_NAME = re.compile(r"Tool Name: (.+)")
+_TOOL_ARGUMENT = re.compile(r"Tool Arguments: \{['\"](\w+)['\"]")
+_ACTION_THOUGHT = "Thought: I should use the tool first."
+
+RESEARCH = "\n".join([
+    "Key findings:",
+    "- WTI and Brent crude futures are the two global benchmarks, traded on NYMEX and ICE.",
+    "- Average daily volume in WTI futures exceeded 1.2 million contracts in 2023.",
+    "- OPEC+ cut output by 2 million barrels per day in October 2022, tightening supply.",
+    "- Contango occurs when deferred futures trade above spot, which erodes roll yield for long holders.",
+    "- Crude oil futures are quoted in dollars per barrel with a contract size of 1,000 barrels.",
+    "- Inventory reports from the EIA every Wednesday regularly move prices by 2% or more.",
+    "- Backwardation signals tight near-term supply and rewards long roll positions.",
+    "- Margin requirements for one WTI contract are typically between $5,000 and $8,000.",
+])
+
+POSTS = {
+    "linkedin": (
+        "CRUDE OIL FUTURES 101 📊\n"
+        "Here's what every trader should know about the world's most traded commodity.\n\n"
+        "Key Statistics:\n"
+        "• WTI volume topped 1.2 million contracts a day in 2023\n"
+        "• One contract covers 1,000 barrels\n\n"
+        "Watch the weekly EIA inventory report and the futures curve shape.\n\n"
+        "#CrudeOil #Futures #Trading"
+    ),
+    "twitter": "\n\n".join([
+        "1/5 Crude oil futures explained in five tweets 🧵",
+        "2/5 WTI and Brent are the two benchmarks, traded on NYMEX and ICE.",
+        "3/5 One contract is 1,000 barrels, quoted in dollars per barrel.",
+        "4/5 Contango erodes roll yield for longs; backwardation rewards them.",
+        "5/5 Watch the EIA report every Wednesday. Follow for more!\n\n#CrudeOil #Futures",
+    ]),
+    "instagram": "\n\n".join([
+        "1. Crude oil futures in 60 seconds 🛢️",
+        "2. WTI and Brent are the global benchmarks.",
+        "3. One contract equals 1,000 barrels.",
+        "4. Contango hurts longs, backwardation helps.",
+        "5. Save this post and follow for more!",
+        "#crudeoil #futures #trading",
+    ]),
+}
+
+
+class FakeLLM(StreamingLLM):
+    """
+    LLM that answers CrewAI's ReAct prompts locally after `latency_s` (+/- `jitter_s`).
+    Agents with tools call their first tool once, then give a final answer;
+    writers answer with a canned, format-valid post for the requested platform.
+    Calls still go through the "openai" rate limiter and stream to the token sink.
+    """
+
+    def __init__(self, latency_s: float = 0.0, jitter_s: float = 0.0, **kwargs):
+        super().__init__(model=kwargs.pop("model", "fake/benchmark"), **kwargs)
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+
+    def _respond(self, messages: List[Dict[str, str]]) -> str:
+        time.sleep(max(self.latency_s + random.uniform(-self.jitter_s, self.jitter_s), 0.0))
+        prompt = "\n".join(str(message.get("content") or "") for message in messages)
+        tool = _TOOL_NAME.search(prompt)
+        # CrewAI's own format instructions mention "Observation:", so look for our earlier action.
+        acted = _ACTION_THOUGHT in prompt
+        if tool and not acted:
+            argument = _TOOL_ARGUMENT.search(prompt)
+            # A unique prompt per call keeps the image store from turning the run into cache hits.
+            value = f"benchmark background {uuid.uuid4().hex}" if "Image" in tool.group(1) else "crude oil futures"
+            return (
+                f"{_ACTION_THOUGHT}\n"
+                f"Action: {tool.group(1).strip()}\n"
+                f"Action Input: {json.dumps({argument.group(1) if argument else 'query': value})}"
+            )
+        if tool:
+            observation = prompt.rsplit("Observation:", 1)[1].strip().splitlines()[0]
+            answer = observation if "Image" in tool.group(1) else RESEARCH
+            return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+        lowered = prompt.lower()
+        platform = next((name for name in POSTS if f"for {name}" in lowered), "linkedin")
+        return f"Thought: I now can give a great answer\nFinal Answer: {POSTS[platform]}"
+
+    def _complete(self, messages: List[Dict[str, str]], callbacks: List[Any]) -> str:
+        def respond() -> str:
+            text = self._respond(messages)
+            sink = current_token_sink()
+            if sink is not None:
+                new_completion = getattr(sink, "new_completion", None)
+                if new_completion is not None:
+                    new_completion()
+                for start in range(0, len(text), 16):
+                    sink(text[start:start + 16])
+            return text
+
+        return get_rate_limiter("openai").call(respond, tokens=self._estimate_tokens(messages))
+
+
+class FakeImageTool(ImageGenerationTool):
+    """`ImageGenerationTool` whose generation call sleeps and writes a local image instead."""
+
+    latency_s: float = 0.0
+
+    def __init__(self, output_dir: str = "img", latency_s: float = 0.0, **data):
+        super().__init__(output_dir=output_dir, **data)
+        self.latency_s = latency_s
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _generate(self, prompt: str, key: str, timings: Dict[str, float]) -> str:
+        started = time.perf_counter()
+        get_rate_limiter("openai_images").call(lambda: time.sleep(self.latency_s))
+        timings["generate_s"] = round(time.perf_counter() - started, 3)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".part")
+        os.close(fd)
+        try:
+            _write_image(tmp_path, key)
+            return self.store.put(key, tmp_path, {"model": "fake", "prompt": prompt})
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+def _write_image(path: str, key: str) -> None:
+    try:
+        from PIL import Image
+    except ImportError:
+        with open(path, "wb") as f:
+            f.write(_TINY_PNG)
+        return
+    color = tuple(int(key[i:i + 2], 16) for i in (0, 2, 4))
+    gradient = Image.linear_gradient("L").resize((1024, 1024))
+    Image.merge("RGB", [gradient.point(lambda v, c=c: (v + c) // 2) for c in color]).save(path, format="PNG")
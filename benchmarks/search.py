@@ -0,0 +1,79 @@
+"""
+Offline benchmark of the search client against the fixture backend.
+Simulates several researcher agents issuing overlapping queries and compares
+backend calls and wall-clock time with and without caching/coalescing.
+
+Usage:
+    python -m benchmarks.search --agents 8 --latency-ms 300
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from tools.search.backends import FixtureBackend
+from tools.search.client import SearchClient, default_scopes
+
+QUERIES = [
+    "crude oil futures price drivers",
+    "Crude oil futures price drivers?",
+    "crude oil futures contango explained",
+    "WTI vs Brent spread",
+    "wti vs brent spread",
+    "OPEC production cuts impact on crude futures",
+]
+
+
+def _run_naive(agents: int, latency_s: float) -> Dict[str, float]:
+    backend = FixtureBackend(latency_s=latency_s)
+    scopes = default_scopes()
+
+    def agent_run(_: int) -> None:
+        for query in QUERIES:
+            for scope in scopes:
+                backend.search(query, scope)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=agents) as executor:
+        list(executor.map(agent_run, range(agents)))
+    return {"elapsed_s": round(time.perf_counter() - started, 3), "backend_calls": backend.calls}
+
+
+def _run_client(agents: int, latency_s: float) -> Dict[str, float]:
+    backend = FixtureBackend(latency_s=latency_s)
+    client = SearchClient(backend)
+    scopes = default_scopes()
+
+    def agent_run(_: int) -> None:
+        for query in QUERIES:
+            client.search_scopes(query, scopes)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=agents) as executor:
+        list(executor.map(agent_run, range(agents)))
+    return {
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "backend_calls": backend.calls,
+        "cache_hits": client.stats.cache_hits,
+        "coalesced": client.stats.coalesced,
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark search caching and coalescing offline.")
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    latency_s = args.latency_ms / 1000
+    print(json.dumps({
+        "agents": args.agents,
+        "queries_per_agent": len(QUERIES),
+        "naive": _run_naive(args.agents, latency_s),
+        "client": _run_client(args.agents, latency_s),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
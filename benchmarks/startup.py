@@ -0,0 +1,108 @@
+"""
+Startup benchmark: import time of the main modules and cold start to first
+preview render, each measured in a fresh interpreter. Imports run in an empty
+working directory so any files they create show up as side effects.
+
+Usage:
+    python -m benchmarks.startup --repeat 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "constants.content_requirements",
+    "utils.preview_renderer",
+    "crew.batch",
+    "tools.image_generation.image_gen",
+    "crew.pipeline",
+    "app",
+]
+
+_IMPORT_SNIPPET = (
+    "import time, importlib; t = time.perf_counter(); importlib.import_module({module!r}); "
+    "print(time.perf_counter() - t)"
+)
+
+_FIRST_RENDER_SNIPPET = (
+    "from constants.content_requirements import Platform\n"
+    "from utils.preview_renderer import render_preview\n"
+    "for platform in Platform:\n"
+    "    render_preview(platform, '1/ Crude oil futures explained\\n2/ Contango and backwardation\\n#Oil')\n"
+)
+
+
+def _run_python(code: str, cwd: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def measure_import(module: str, repeat: int) -> Dict[str, Any]:
+    """Import `module` in `repeat` fresh interpreters, reporting timings and files it created."""
+    samples: List[float] = []
+    created: List[str] = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            result = _run_python(_IMPORT_SNIPPET.format(module=module), cwd)
+            if result.returncode != 0:
+                return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "import failed"}
+            samples.append(float(result.stdout.strip().splitlines()[-1]))
+            created = sorted(os.listdir(cwd))
+    return {**_summary(samples), "side_effect_files": created}
+
+
+def measure_first_render(repeat: int) -> Dict[str, Any]:
+    """Wall time from interpreter launch to rendered previews for every platform."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            started = time.perf_counter()
+            result = _run_python(_FIRST_RENDER_SNIPPET, cwd)
+            if result.returncode != 0:
+                return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "render failed"}
+            samples.append(time.perf_counter() - started)
+    baseline = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _run_python("pass", REPO_ROOT)
+        baseline.append(time.perf_counter() - started)
+    return {**_summary(samples), "interpreter_baseline": _summary(baseline)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure import and cold-start time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "imports": {module: measure_import(module, args.repeat) for module in MODULES},
+        "cold_start_to_first_render": measure_first_render(args.repeat),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ and audience expertise levels.
 """
 
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 class Platform(Enum):
     """Supported social media platforms for content generation."""
@@ -75,3 +75,39 @@ PLATFORM_FORMATS: Dict[str, Dict[str, Any]] = {
         )
     }
 }
+
+# Token budget for the research digest handed to the writer, per platform.
+# Short formats need only a handful of facts; long-form posts get more.
+RESEARCH_TOKEN_BUDGETS: Dict[str, int] = {
+    Platform.LINKEDIN.value: 600,
+    Platform.TWITTER.value: 400,
+    Platform.INSTAGRAM.value: 300
+}
+
+# Hard format rules checked (and repaired where possible) after writing.
+# `hashtags` is where hashtags belong: the "last_item" of a thread, a trailing
+# "block" after the slides, or the "end" of a single post.
+PLATFORM_RULES: Dict[str, Dict[str, Any]] = {
+    Platform.LINKEDIN.value: {
+        "max_chars": 3000,
+        "hashtags": "end"
+    },
+    Platform.TWITTER.value: {
+        "max_chars": 280,
+        "min_items": 5,
+        "max_items": 7,
+        "hashtags": "last_item"
+    },
+    Platform.INSTAGRAM.value: {
+        "min_items": 5,
+        "max_items": 7,
+        "hashtags": "block"
+    }
+}
+
+# Native image size (width, height) in pixels for each platform's feed.
+PLATFORM_IMAGE_SIZES: Dict[str, Tuple[int, int]] = {
+    Platform.LINKEDIN.value: (1200, 627),
+    Platform.TWITTER.value: (1600, 900),
+    Platform.INSTAGRAM.value: (1080, 1350)
+}
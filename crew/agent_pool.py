@@ -0,0 +1,130 @@
+"""
+Process-wide pool of pre-built agents shared by Streamlit reruns and batch jobs.
+Agents are checked out for exclusive use by one crew at a time, reset, and
+returned for the next request, so repeated generations skip agent and tool
+construction and keep their HTTP connections warm.
+"""
+
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple
+from crewai import Agent
+
+_pool: Optional["AgentPool"] = None
+_pool_lock = threading.Lock()
+
+PoolKey = Tuple[str, Tuple[Any, ...]]
+
+# Agents the pipeline checks out for a default request.
+DEFAULT_WARM_SPECS = (("researcher", "trading"), ("writer",), ("image_designer",))
+
+
+def _default_factories() -> Dict[str, Callable[..., Agent]]:
+    from crew.agents.image_designer import get_image_designer_agent
+    from crew.agents.researcher import get_researcher_agent
+    from crew.agents.writer import get_writer_agent
+    from tools.image_generation.image_gen import ImageGenerationTool
+
+    # One image tool for every pooled designer: its HTTP session and image store are thread-safe.
+    image_tool = ImageGenerationTool()
+    return {
+        "researcher": get_researcher_agent,
+        "writer": get_writer_agent,
+        "image_designer": lambda: get_image_designer_agent(image_tool=image_tool),
+    }
+
+
+def reset_agent(agent: Agent) -> None:
+    """Clear per-request state CrewAI leaves on an agent after a kickoff."""
+    agent.crew = None
+    if hasattr(agent, "tools_results"):
+        agent.tools_results = []
+    if hasattr(agent, "_times_executed"):
+        agent._times_executed = 0
+    tools_handler = getattr(agent, "tools_handler", None)
+    if tools_handler is not None and hasattr(tools_handler, "last_used_tool"):
+        tools_handler.last_used_tool = {}
+
+
+class AgentPool:
+    """
+    Thread-safe pool of idle agents per role and factory arguments.
+    Args:
+        factories: Role name to agent factory; defaults to the agents in `crew/agents`
+        max_idle: Maximum idle agents kept per role/arguments combination
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[..., Agent]]] = None, max_idle: int = 8):
+        self._factories = factories
+        self.max_idle = max_idle
+        self._idle: Dict[PoolKey, Deque[Agent]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _factory(self, role: str) -> Callable[..., Agent]:
+        with self._lock:
+            if self._factories is None:
+                self._factories = _default_factories()
+            if role not in self._factories:
+                raise KeyError(f"Unknown agent role: {role}")
+            return self._factories[role]
+
+    def acquire(self, role: str, *args: Any) -> Agent:
+        """Take an idle agent for `role` built with `args`, or build a new one."""
+        key = (role, args)
+        with self._lock:
+            if self._idle[key]:
+                self.reused += 1
+                return self._idle[key].pop()
+        agent = self._factory(role)(*args)
+        with self._lock:
+            self.created += 1
+        return agent
+
+    def release(self, role: str, agent: Agent, *args: Any) -> None:
+        """Reset an agent and make it available again."""
+        reset_agent(agent)
+        key = (role, args)
+        with self._lock:
+            if len(self._idle[key]) < self.max_idle:
+                self._idle[key].append(agent)
+
+    @contextmanager
+    def checkout(self, role: str, *args: Any) -> Iterator[Agent]:
+        """Use an agent exclusively for the duration of the block."""
+        agent = self.acquire(role, *args)
+        try:
+            yield agent
+        finally:
+            self.release(role, agent, *args)
+
+    def warm(self, specs: Iterable[Tuple[Any, ...]] = DEFAULT_WARM_SPECS, count: int = 1) -> "AgentPool":
+        """Pre-build `count` idle agents for each `(role, *factory_args)` spec."""
+        for role, *args in specs:
+            agents = [self.acquire(role, *args) for _ in range(count)]
+            for agent in agents:
+                self.release(role, agent, *args)
+        return self
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = sum(len(agents) for agents in self._idle.values())
+        return {"created": self.created, "reused": self.reused, "idle": idle}
+
+
+def set_agent_pool(pool: Optional[AgentPool]) -> None:
+    """Replace the process-wide pool, e.g. with one built from stand-in agents."""
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def get_agent_pool() -> AgentPool:
+    """Returns the process-wide agent pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AgentPool()
+        return _pool
@@ -3,11 +3,14 @@ Image Designer agent for generating background images for social media content.
 Specializes in creating minimal, text-friendly designs with appropriate color schemes.
 """
 
+from typing import Optional
 from crewai import Agent
+from crew.llm import get_llm
+from crew.memory import get_memory_config
 from tools.image_generation.image_gen import ImageGenerationTool
 
-def get_image_designer_agent() -> Agent:
-    """Returns a configured Image Designer agent."""
+def get_image_designer_agent(image_tool: Optional[ImageGenerationTool] = None) -> Agent:
+    """Returns a configured Image Designer agent, optionally sharing an existing image tool."""
     return Agent(
         role='Image Designer',
         goal='Create subtle, text-friendly background images for social media content',
@@ -18,6 +21,7 @@ def get_image_designer_agent() -> Agent:
             "text overlays without competing for attention."
         ),
         verbose=True,
-        memory=True,
-        tools=[ImageGenerationTool()]
+        memory=get_memory_config().enabled,
+        llm=get_llm(),
+        tools=[image_tool or ImageGenerationTool()]
     )
\ No newline at end of file
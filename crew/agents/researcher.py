@@ -3,11 +3,12 @@ Researcher agent for gathering detailed information and insights about topics.
 """
 
 from crewai import Agent
-from crewai_tools import SerperDevTool
-from constants.domains import PREFERRED_DOMAINS
+from crew.llm import get_llm
+from crew.memory import get_memory_config
+from tools.search.search_tool import SearchTool
 
-def get_researcher_agent() -> Agent:
-    """Returns a configured Researcher agent."""
+def get_researcher_agent(domain_category: str = "trading") -> Agent:
+    """Returns a configured Researcher agent searching the given `PREFERRED_DOMAINS` category."""
     return Agent(
         role='Researcher',
         goal='Gather detailed and relevant information about {topic}.',
@@ -17,19 +18,7 @@ def get_researcher_agent() -> Agent:
             "Prioritizes authoritative sources and cross-references information."
         ),
         verbose=True,
-        memory=True,
-        tools=[
-            SerperDevTool(
-                search_params={
-                    "site": " OR ".join(PREFERRED_DOMAINS.get("trading", [])),
-                    "num": 5
-                }
-            ),
-            SerperDevTool(
-                search_params={
-                    "num": 5,
-                    "exclude": "pinterest.com,facebook.com,instagram.com"
-                }
-            )
-        ]
-    )
\ No newline at end of file
+        memory=get_memory_config().enabled,
+        llm=get_llm(),
+        tools=[SearchTool(domain_category=domain_category)]
+    )
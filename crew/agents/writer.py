@@ -3,6 +3,8 @@ Writer agent for creating platform-specific social media content.
 """
 
 from crewai import Agent
+from crew.llm import get_llm
+from crew.memory import get_memory_config
 
 def get_writer_agent() -> Agent:
     """Returns a configured Writer agent."""
@@ -15,5 +17,6 @@ def get_writer_agent() -> Agent:
             "matches each platform's unique style and requirements."
         ),
         verbose=True,
-        memory=True
+        memory=get_memory_config().enabled,
+        llm=get_llm()
     ) 
\ No newline at end of file
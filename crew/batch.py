@@ -0,0 +1,289 @@
+"""
+Headless batch runner for generating a content calendar in one go.
+Reads (topic, platform, expertise_level) jobs from a JSONL or CSV file, runs them
+with a bounded number of workers and appends each result to a JSONL file as soon
+as it finishes, so an interrupted batch can be resumed where it stopped.
+
+Usage:
+    python -m crew.batch jobs.jsonl --output results.jsonl --workers 4
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+from constants.content_requirements import Platform, ExpertiseLevel
+from crew.memory import MEMORY_BACKENDS, get_memory_config, memory_stats, set_memory_config
+from utils.rate_limit import rate_limit_stats
+from utils.tracing import set_tracing
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """A single generation request in a batch."""
+    job_id: str
+    topic: str
+    platform: Platform
+    expertise_level: ExpertiseLevel
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "BatchJob":
+        """Build a job from a JSONL object or CSV row."""
+        topic = (record.get("topic") or "").strip()
+        if not topic:
+            raise ValueError(f"Job is missing a topic: {record}")
+        platform = Platform(str(record.get("platform", "")).strip().lower())
+        expertise = record.get("expertise_level") or record.get("expertise") or ""
+        expertise_level = ExpertiseLevel(str(expertise).strip().lower())
+        job_id = str(record.get("id") or "").strip() or _default_job_id(topic, platform, expertise_level)
+        return cls(job_id=job_id, topic=topic, platform=platform, expertise_level=expertise_level)
+
+
+@dataclass
+class BatchSummary:
+    """Outcome counts for a batch run."""
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    tokens_saved: int = 0
+    elapsed_s: float = 0.0
+    failures: List[str] = field(default_factory=list)
+
+
+def _default_job_id(topic: str, platform: Platform, expertise_level: ExpertiseLevel) -> str:
+    key = f"{' '.join(topic.lower().split())}|{platform.value}|{expertise_level.value}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """
+    Load jobs from a `.jsonl` or `.csv` file.
+    Each record needs `topic`, `platform` and `expertise_level` (or `expertise`);
+    an optional `id` overrides the derived job id. Duplicate jobs are dropped.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            records: Iterable[Dict[str, Any]] = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    jobs: Dict[str, BatchJob] = {}
+    for record in records:
+        job = BatchJob.from_record(record)
+        jobs.setdefault(job.job_id, job)
+    return list(jobs.values())
+
+
+def completed_job_ids(output_path: str) -> Set[str]:
+    """Return ids of jobs that already finished successfully in `output_path`."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write leaves a truncated last line; that job is rerun.
+                continue
+            if record.get("status") == "ok":
+                done.add(record.get("job_id"))
+    return done
+
+
+class ResultWriter:
+    """Thread-safe, append-only JSONL writer that flushes every record to disk."""
+
+    def __init__(self, output_path: str):
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(output_path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _result_record(job: BatchJob, started: float, result: Optional[Dict[str, Any]] = None,
+                   error: Optional[BaseException] = None) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "job_id": job.job_id,
+        "topic": job.topic,
+        "platform": job.platform.value,
+        "expertise_level": job.expertise_level.value,
+        "status": "ok" if error is None else "error",
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if error is None:
+        record.update(result or {})
+    else:
+        record["error"] = f"{type(error).__name__}: {error}"
+    return record
+
+
+def _run_job(job: BatchJob, with_image: bool) -> Dict[str, Any]:
+    from crew.pipeline import run_pipeline
+
+    started = time.perf_counter()
+    try:
+        result = run_pipeline(job.topic, job.platform, job.expertise_level, with_image=with_image)
+    except Exception as e:
+        return _result_record(job, started, error=e)
+    return _result_record(job, started, result=result)
+
+
+async def _run_job_async(job: BatchJob, with_image: bool) -> Dict[str, Any]:
+    from crew.pipeline import run_pipeline_async
+
+    started = time.perf_counter()
+    try:
+        result = await run_pipeline_async(job.topic, job.platform, job.expertise_level, with_image=with_image)
+    except Exception as e:
+        return _result_record(job, started, error=e)
+    return _result_record(job, started, result=result)
+
+
+def _record_outcome(summary: BatchSummary, record: Dict[str, Any]) -> None:
+    if record["status"] == "ok":
+        summary.succeeded += 1
+        summary.tokens_saved += (record.get("digest") or {}).get("tokens_saved", 0)
+    else:
+        summary.failed += 1
+        summary.failures.append(f"{record['job_id']}: {record['error']}")
+    print(f"[{record['status']}] {record['job_id']} {record['platform']}/{record['expertise_level']} "
+          f"'{record['topic']}' in {record['elapsed_s']}s")
+
+
+def _run_threaded(jobs: List[BatchJob], writer: ResultWriter, workers: int,
+                  with_image: bool, summary: BatchSummary) -> None:
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        futures = [executor.submit(_run_job, job, with_image) for job in jobs]
+        for future in as_completed(futures):
+            record = future.result()
+            writer.write(record)
+            _record_outcome(summary, record)
+
+
+async def _run_async(jobs: List[BatchJob], writer: ResultWriter, workers: int,
+                     with_image: bool, summary: BatchSummary) -> None:
+    semaphore = asyncio.Semaphore(workers)
+
+    async def bounded(job: BatchJob) -> Dict[str, Any]:
+        async with semaphore:
+            return await _run_job_async(job, with_image)
+
+    for next_done in asyncio.as_completed([bounded(job) for job in jobs]):
+        record = await next_done
+        writer.write(record)
+        _record_outcome(summary, record)
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    output_path: str,
+    workers: int = 4,
+    mode: str = "thread",
+    with_image: bool = True,
+    resume: bool = True
+) -> BatchSummary:
+    """
+    Run `jobs` concurrently and append one JSONL record per job to `output_path`.
+    Args:
+        jobs: Jobs to run
+        output_path: JSONL file results are appended to
+        workers: Maximum number of jobs in flight
+        mode: "thread" for a thread pool, "async" for asyncio with `kickoff_async`
+        with_image: Also run the image design crew for every job
+        resume: Skip jobs that already succeeded in `output_path`
+    Returns:
+        BatchSummary: Counts of skipped, succeeded and failed jobs
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if mode not in ("thread", "async"):
+        raise ValueError(f"Unknown batch mode: {mode}")
+
+    summary = BatchSummary(total=len(jobs))
+    if resume:
+        done = completed_job_ids(output_path)
+        pending = [job for job in jobs if job.job_id not in done]
+        summary.skipped = len(jobs) - len(pending)
+    else:
+        pending = list(jobs)
+
+    started = time.perf_counter()
+    if pending:
+        from crew.agent_pool import get_agent_pool
+
+        get_agent_pool().warm(count=min(workers, len(pending)))
+    with ResultWriter(output_path) as writer:
+        if mode == "async":
+            asyncio.run(_run_async(pending, writer, workers, with_image, summary))
+        else:
+            _run_threaded(pending, writer, workers, with_image, summary)
+    summary.elapsed_s = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate social media content for a batch of jobs.")
+    parser.add_argument("jobs", help="JSONL or CSV file with topic, platform and expertise_level columns")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Number of concurrent jobs")
+    parser.add_argument("--mode", choices=["thread", "async"], default="thread")
+    parser.add_argument("--no-images", action="store_true", help="Skip image generation")
+    parser.add_argument("--no-resume", action="store_true", help="Rerun jobs that already succeeded")
+    parser.add_argument("--memory", choices=MEMORY_BACKENDS,
+                        help="Agent memory backend (default from AGENT_MEMORY, 'none' unless set)")
+    parser.add_argument("--trace", metavar="FILE", help="Append tracing spans to this JSONL file")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        set_memory_config(replace(get_memory_config(), backend=args.memory))
+    if args.trace:
+        set_tracing(True, args.trace)
+
+    summary = run_batch(
+        load_jobs(args.jobs),
+        output_path=args.output,
+        workers=args.workers,
+        mode=args.mode,
+        with_image=not args.no_images,
+        resume=not args.no_resume
+    )
+    print(f"Batch finished in {summary.elapsed_s}s: {summary.succeeded} succeeded, "
+          f"{summary.failed} failed, {summary.skipped} skipped of {summary.total}")
+    print(f"Research digest saved ~{summary.tokens_saved} writer prompt tokens")
+    for store, stats in memory_stats().items():
+        print(f"Memory {store}: {stats}")
+    for provider, stats in rate_limit_stats().items():
+        print(f"Rate limit {provider}: {stats}")
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
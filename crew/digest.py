@@ -0,0 +1,188 @@
+"""
+Research digest: compacts the researcher's findings before they reach the writer.
+The research output is parsed into individual facts, near-duplicates are removed,
+facts are ranked and the best ones are kept within the token budget of the
+target platform (`RESEARCH_TOKEN_BUDGETS`). Runs locally, no LLM calls.
+
+Configured through environment variables:
+    RESEARCH_DIGEST  "off" passes the full research to the writer
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+from constants.content_requirements import Platform, RESEARCH_TOKEN_BUDGETS
+
+# Facts whose word sets overlap this much (Jaccard) are treated as the same fact;
+# so is a fact whose words are almost all contained in another one.
+DUPLICATE_THRESHOLD = 0.6
+CONTAINMENT_THRESHOLD = 0.85
+MIN_FACT_WORDS = 4
+
+_BULLET = re.compile(r"^\s*(?:[-*•▪◦]+|\d+[.)]|[a-zA-Z][.)](?=\s))\s*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_WORD = re.compile(r"[a-z0-9][a-z0-9'%$.]*")
+_NUMERIC = re.compile(r"\d")
+_QUANTITY = re.compile(r"\d\s*%|[$€£]\s*\d|\b(?:19|20)\d{2}\b|\d(?:\.\d+)?\s*(?:million|billion|trillion|bn|m|k)\b", re.I)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to was were will with which their they than these those into over about".split()
+)
+
+
+@dataclass
+class Fact:
+    """A single statement from the research and its rank score."""
+    text: str
+    position: int
+    score: float = 0.0
+    words: FrozenSet[str] = field(default_factory=frozenset)
+
+
+@dataclass
+class ResearchDigest:
+    """The compacted research handed to the writer and what it saved."""
+    text: str
+    facts: List[str]
+    original_tokens: int
+    digest_tokens: int
+    parsed_facts: int = 0
+    duplicates_removed: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.digest_tokens, 0)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "original_tokens": self.original_tokens,
+            "digest_tokens": self.digest_tokens,
+            "tokens_saved": self.tokens_saved,
+            "facts_kept": len(self.facts),
+            "facts_parsed": self.parsed_facts,
+            "duplicates_removed": self.duplicates_removed,
+        }
+
+
+def digest_enabled() -> bool:
+    return os.getenv("RESEARCH_DIGEST", "on").lower() not in ("off", "0", "false")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _content_words(text: str) -> FrozenSet[str]:
+    return frozenset(w.strip(".") for w in _WORD.findall(text.lower()) if w not in _STOPWORDS)
+
+
+def parse_facts(research: str) -> List[Fact]:
+    """
+    Split research output into individual statements.
+    Bullets and numbering are stripped, paragraphs are split into sentences and
+    section headers (short lines ending in a colon or starting with '#') are dropped.
+    """
+    facts: List[Fact] = []
+    for line in research.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        line = _BULLET.sub("", line).replace("**", "").replace("__", "").strip()
+        if line.endswith(":") and len(line.split()) <= 8:
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            sentence = sentence.strip()
+            if len(sentence.split()) < MIN_FACT_WORDS:
+                continue
+            facts.append(Fact(text=sentence, position=len(facts), words=_content_words(sentence)))
+    return facts
+
+
+def is_duplicate(a: FrozenSet[str], b: FrozenSet[str], threshold: float = DUPLICATE_THRESHOLD) -> bool:
+    """Whether two facts, given as content-word sets, state the same thing."""
+    if not a or not b:
+        return False
+    shared = len(a & b)
+    return shared / len(a | b) >= threshold or shared / min(len(a), len(b)) >= CONTAINMENT_THRESHOLD
+
+
+def dedupe_facts(facts: List[Fact], threshold: float = DUPLICATE_THRESHOLD) -> List[Fact]:
+    """Drop facts that repeat an earlier fact, keeping the higher-scoring of each pair."""
+    kept: List[Fact] = []
+    for fact in facts:
+        for i, other in enumerate(kept):
+            if is_duplicate(fact.words, other.words, threshold):
+                if fact.score > other.score:
+                    kept[i] = fact
+                break
+        else:
+            kept.append(fact)
+    return kept
+
+
+def score_facts(facts: List[Fact], topic: str = "") -> List[Fact]:
+    """
+    Score facts in place: concrete figures, topic relevance and earlier position rank
+    higher; very long statements are penalized because they cost more of the budget.
+    """
+    topic_words = _content_words(topic)
+    count = max(len(facts), 1)
+    for fact in facts:
+        score = 0.0
+        if _NUMERIC.search(fact.text):
+            score += 1.0
+        score += 0.5 * min(len(_QUANTITY.findall(fact.text)), 3)
+        if topic_words:
+            score += 1.5 * len(topic_words & fact.words) / len(topic_words)
+        score += 1.0 - fact.position / count
+        words = len(fact.text.split())
+        if words > 40:
+            score -= (words - 40) / 40
+        fact.score = round(score, 4)
+    return facts
+
+
+def build_digest(research: str, platform: Platform, topic: str = "",
+                 budget: Optional[int] = None) -> ResearchDigest:
+    """
+    Compact `research` to the token budget of `platform`.
+    Args:
+        research: Raw output of the research task
+        platform: Target platform, selects the budget from `RESEARCH_TOKEN_BUDGETS`
+        topic: Topic of the post, used to rank relevant facts higher
+        budget: Overrides the platform budget
+    Returns:
+        ResearchDigest: Kept facts, in their original order, as a bullet list
+    """
+    original_tokens = estimate_tokens(research)
+    budget = budget if budget is not None else RESEARCH_TOKEN_BUDGETS.get(platform.value, 500)
+    facts = score_facts(parse_facts(research), topic)
+    unique = dedupe_facts(facts)
+
+    selected: List[Fact] = []
+    used = 0
+    for fact in sorted(unique, key=lambda f: (-f.score, f.position)):
+        cost = estimate_tokens(fact.text) + 1
+        if used + cost > budget and selected:
+            continue
+        selected.append(fact)
+        used += cost
+    selected.sort(key=lambda f: f.position)
+
+    text = "\n".join(f"- {fact.text}" for fact in selected)
+    if not selected or estimate_tokens(text) >= original_tokens:
+        # Nothing parseable, or the research already fits: pass it through unchanged.
+        return ResearchDigest(
+            text=research, facts=[f.text for f in facts], original_tokens=original_tokens,
+            digest_tokens=original_tokens, parsed_facts=len(facts)
+        )
+    return ResearchDigest(
+        text=text,
+        facts=[fact.text for fact in selected],
+        original_tokens=original_tokens,
+        digest_tokens=estimate_tokens(text),
+        parsed_facts=len(facts),
+        duplicates_removed=len(facts) - len(unique)
+    )
@@ -0,0 +1,404 @@
+"""
+Streaming export of generated posts for scheduling tools.
+Posts are read from the history store in id order and written one at a time:
+either as a plain JSONL/CSV file, or as a bundle (zip, tar, tar.gz or a
+directory) holding the posts file, the images and rendered previews. Images are
+stored once under the hash of their content (`images/<sha256>.<ext>`) and posts
+reference them by that name; HTML previews load them from `../images/` rather
+than inlining them, and PNG previews are screenshotted in batches over the
+browser pool. A checkpoint file remembers the last exported post, so the next
+run only exports what was generated since. With a checkpoint, earlier exports are
+kept: JSONL/CSV files are appended to, and each archive run is written next to
+the destination under its id range, e.g. `export-41-97.zip`.
+
+Usage:
+    python -m crew.export posts.jsonl
+    python -m crew.export posts.jsonl --checkpoint .cache/export-jsonl.json
+    python -m crew.export export.zip --format csv --checkpoint .cache/export.json
+    python -m crew.export export/ --checkpoint .cache/export.json --previews png
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from constants.content_requirements import Platform
+from crew.history import HistoryPost, HistoryStore, get_history_store
+
+FORMATS = ("jsonl", "csv")
+PREVIEW_MODES = ("html", "png", "none")
+CSV_FIELDS = ("id", "topic", "platform", "expertise_level", "created_at", "content",
+              "image", "images", "slides", "preview")
+_HASH_CHUNK_BYTES = 1024 * 1024
+# Already compressed formats are stored as they are in zip bundles.
+_STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+_ARCHIVE_EXTENSIONS = (".tar.gz", ".tgz", ".zip", ".tar")
+# PNG previews are screenshotted this many at a time, bounding the posts held in memory.
+PNG_PREVIEW_BATCH = 32
+
+
+@dataclass
+class ExportSummary:
+    """What an export wrote."""
+    posts: int = 0
+    images: int = 0
+    duplicate_images: int = 0
+    missing_images: int = 0
+    previews: int = 0
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    elapsed_s: float = 0.0
+    path: Optional[str] = None
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_checkpoint(path: str) -> int:
+    """Id of the last post a previous export wrote, 0 when there is none."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return int(json.load(f).get("last_id", 0))
+
+
+def write_checkpoint(path: str, summary: ExportSummary, destination: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_id": summary.last_id, "exported_at": time.time(), "destination": destination}, f)
+    os.replace(tmp_path, path)
+
+
+class Bundle(ABC):
+    """Destination for exported files; entries are streamed from disk."""
+
+    @abstractmethod
+    def add_file(self, name: str, path: str) -> None:
+        """Add the file at `path` under `name`."""
+
+    @abstractmethod
+    def has(self, name: str) -> bool:
+        """Whether an entry `name` exists, e.g. an image added by this or an earlier export."""
+
+    def close(self) -> None:
+        pass
+
+
+class DirectoryBundle(Bundle):
+    """Plain directory. Content-addressed images from earlier exports are kept and not copied again."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def has(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.root, name))
+
+    def add_file(self, name: str, path: str) -> None:
+        target = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.part"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+
+
+class ZipBundle(Bundle):
+    def __init__(self, path: str):
+        self._zip = zipfile.ZipFile(path, "w", allowZip64=True)
+        self._names = set()
+
+    def has(self, name: str) -> bool:
+        return name in self._names
+
+    def add_file(self, name: str, path: str) -> None:
+        compression = zipfile.ZIP_STORED if name.lower().endswith(_STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+        self._zip.write(path, name, compress_type=compression)
+        self._names.add(name)
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+class TarBundle(Bundle):
+    def __init__(self, path: str):
+        self._tar = tarfile.open(path, "w:gz" if path.lower().endswith((".gz", ".tgz")) else "w")
+        self._names = set()
+
+    def has(self, name: str) -> bool:
+        return name in self._names
+
+    def add_file(self, name: str, path: str) -> None:
+        self._tar.add(path, arcname=name, recursive=False)
+        self._names.add(name)
+
+    def close(self) -> None:
+        self._tar.close()
+
+
+def _insert_before_extension(destination: str, text: str) -> str:
+    for extension in _ARCHIVE_EXTENSIONS:
+        if destination.lower().endswith(extension):
+            return f"{destination[:-len(extension)]}{text}{destination[-len(extension):]}"
+    return f"{destination}{text}"
+
+
+def ranged_path(destination: str, first_id: int, last_id: int) -> str:
+    """`destination` with the exported id range before its archive extension: `export.zip` -> `export-1-40.zip`."""
+    return _insert_before_extension(destination, f"-{first_id}-{last_id}")
+
+
+def open_bundle(destination: str) -> Bundle:
+    lowered = destination.lower()
+    if lowered.endswith(".zip"):
+        return ZipBundle(destination)
+    if lowered.endswith((".tar", ".tar.gz", ".tgz")):
+        return TarBundle(destination)
+    return DirectoryBundle(destination)
+
+
+class ImageIndex:
+    """
+    Maps image files to content-addressed bundle names and adds each distinct image once.
+    Files are hashed once per export (memoized by path, size and mtime).
+    """
+
+    def __init__(self, bundle: Bundle, summary: ExportSummary):
+        self.bundle = bundle
+        self.summary = summary
+        self._names: Dict[Tuple[str, int, int], str] = {}
+
+    def add(self, path: Optional[str]) -> Optional[str]:
+        if not path or not os.path.isfile(path):
+            if path:
+                self.summary.missing_images += 1
+            return None
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        name = self._names.get(key)
+        if name is None:
+            extension = os.path.splitext(path)[1].lower() or ".bin"
+            name = f"images/{file_digest(path)}{extension}"
+            self._names[key] = name
+        if self.bundle.has(name):
+            self.summary.duplicate_images += 1
+        else:
+            self.bundle.add_file(name, path)
+            self.summary.images += 1
+        return name
+
+
+def post_record(post: HistoryPost, image: Optional[str], images: List[str], slides: List[str],
+                preview: Optional[str]) -> Dict[str, Any]:
+    return {
+        "id": post.id,
+        "topic": post.topic,
+        "platform": post.platform,
+        "expertise_level": post.expertise_level,
+        "created_at": post.created_at,
+        "content": post.content,
+        "image": image,
+        "images": images,
+        "slides": slides,
+        "preview": preview,
+    }
+
+
+class PostWriter:
+    """Writes post records to a JSONL or CSV file as they come in."""
+
+    def __init__(self, f: io.TextIOBase, fmt: str, header: bool = True):
+        self._f = f
+        self._csv = csv.DictWriter(f, fieldnames=CSV_FIELDS) if fmt == "csv" else None
+        if self._csv is not None and header:
+            self._csv.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._csv is None:
+            self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        row = dict(record)
+        for key in ("images", "slides"):
+            row[key] = "|".join(row[key])
+        self._csv.writerow(row)
+
+
+def _render_html_preview(post: HistoryPost, image_names: List[str], workdir: str) -> str:
+    """Render the HTML preview of `post` to `workdir`, loading the bundled images by relative path."""
+    from utils.preview_renderer import render_page
+
+    path = os.path.join(workdir, f"{post.id}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_page(Platform(post.platform), post.content, image_urls=[f"../{name}" for name in image_names]))
+    return path
+
+
+def _render_png_previews(posts: List[HistoryPost], workdir: str) -> List[str]:
+    """Screenshot the previews of `posts` to `workdir` in parallel over the browser pool; paths in input order."""
+    from utils.preview_renderer import PreviewGenerator
+
+    paths: Dict[int, str] = {}
+    for platform in dict.fromkeys(post.platform for post in posts):
+        batch = [post for post in posts if post.platform == platform]
+        rendered = PreviewGenerator(Platform(platform)).save_previews_as_png([{
+            "text": post.content,
+            "image_paths": [path for path in (post.image_paths or [post.image_path]) if path and os.path.isfile(path)],
+            "output_path": os.path.join(workdir, f"{post.id}.png"),
+        } for post in batch])
+        paths.update(zip((post.id for post in batch), rendered))
+    return [paths[post.id] for post in posts]
+
+
+def export_posts(posts: Iterable[HistoryPost], destination: str, fmt: str = "jsonl",
+                 previews: str = "html", incremental: bool = False) -> ExportSummary:
+    """
+    Stream `posts` to `destination`.
+    Args:
+        posts: Posts in id order, e.g. `HistoryStore.iter_posts()`
+        destination: A `.jsonl`/`.csv` file for the posts only, or a `.zip`, `.tar`,
+            `.tar.gz` file or directory for a bundle with images and previews
+        fmt: Posts file format inside a bundle, "jsonl" or "csv"
+        previews: "html", "png" (screenshots through the browser pool) or "none"
+        incremental: Keep earlier exports: append to a JSONL/CSV file and name an
+            archive after the exported id range (see `ranged_path`) instead of overwriting it
+    Returns:
+        ExportSummary: Counts, the id range that was exported and the `path` written
+    """
+    started = time.perf_counter()
+    summary = ExportSummary(path=destination)
+    lowered = destination.lower()
+    if lowered.endswith((".jsonl", ".csv")):
+        header = not (incremental and os.path.exists(destination) and os.path.getsize(destination))
+        with open(destination, "a" if incremental else "w", newline="", encoding="utf-8") as f:
+            writer = PostWriter(f, "csv" if lowered.endswith(".csv") else "jsonl", header)
+            for post in posts:
+                writer.write(post_record(post, post.image_path, post.image_paths, post.slide_paths, None))
+                summary.posts += 1
+                summary.first_id = summary.first_id or post.id
+                summary.last_id = post.id
+        summary.elapsed_s = round(time.perf_counter() - started, 3)
+        return summary
+
+    archive = lowered.endswith(_ARCHIVE_EXTENSIONS)
+    # An incremental archive is written under a temporary name until its id range is known.
+    target = _insert_before_extension(destination, ".part") if incremental and archive else destination
+    bundle = open_bundle(target)
+    finished = False
+    try:
+        with tempfile.TemporaryDirectory(prefix="export-") as workdir:
+            # The posts file is spooled to disk and added last, since archive entries are written one at a time.
+            spool_path = os.path.join(workdir, f"posts.{fmt}")
+            index = ImageIndex(bundle, summary)
+            with open(spool_path, "w", newline="", encoding="utf-8") as spool:
+                writer = PostWriter(spool, fmt)
+                # Posts waiting for their PNG preview, written in order once their batch is rendered.
+                pending: List[Tuple[HistoryPost, Dict[str, Any]]] = []
+
+                def add_preview(post: HistoryPost, record: Dict[str, Any], rendered: str) -> None:
+                    record["preview"] = f"previews/{post.id}.{previews}"
+                    bundle.add_file(record["preview"], rendered)
+                    os.unlink(rendered)
+                    summary.previews += 1
+
+                def write(post: HistoryPost, record: Dict[str, Any]) -> None:
+                    writer.write(record)
+                    summary.posts += 1
+                    summary.first_id = summary.first_id or post.id
+                    summary.last_id = post.id
+
+                def flush_pending() -> None:
+                    rendered = _render_png_previews([post for post, _ in pending], workdir)
+                    for (post, record), path in zip(pending, rendered):
+                        add_preview(post, record, path)
+                        write(post, record)
+                    pending.clear()
+
+                for post in posts:
+                    image = index.add(post.image_path)
+                    images = [name for name in map(index.add, post.image_paths) if name]
+                    slides = [name for name in map(index.add, post.slide_paths) if name]
+                    record = post_record(post, image, images, slides, None)
+                    if previews == "png":
+                        pending.append((post, record))
+                        if len(pending) >= PNG_PREVIEW_BATCH:
+                            flush_pending()
+                        continue
+                    if previews == "html":
+                        image_names = images or ([image] if image else [])
+                        add_preview(post, record, _render_html_preview(post, image_names, workdir))
+                    write(post, record)
+                if pending:
+                    flush_pending()
+            if summary.posts:
+                bundle.add_file(f"posts-{summary.first_id}-{summary.last_id}.{fmt}", spool_path)
+        finished = True
+    finally:
+        bundle.close()
+        if target != destination:
+            if finished and summary.posts:
+                summary.path = ranged_path(destination, summary.first_id, summary.last_id)
+                os.replace(target, summary.path)
+            else:
+                os.unlink(target)
+    summary.elapsed_s = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def iter_new_posts(store: HistoryStore, after_id: int, platform: Optional[Platform] = None) -> Iterator[HistoryPost]:
+    for post in store.iter_posts(after_id):
+        if platform is None or post.platform == platform.value:
+            yield post
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export generated posts, images and previews.")
+    parser.add_argument("destination",
+                        help=".jsonl/.csv for the posts only; .zip, .tar, .tar.gz or a directory for a bundle")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="Posts file format inside a bundle")
+    parser.add_argument("--previews", choices=PREVIEW_MODES, default="html", help="Rendered previews in a bundle")
+    parser.add_argument("--platform", choices=[p.value for p in Platform], help="Only export posts for this platform")
+    parser.add_argument("--since-id", type=int, default=0, help="Only export posts with a higher id")
+    parser.add_argument("--checkpoint", help="JSON file with the last exported id; read before and updated after (one per --platform filter)")
+    args = parser.parse_args(argv)
+
+    store = get_history_store()
+    if store is None:
+        print("History store is disabled (HISTORY=off); nothing to export")
+        return 1
+    after_id = max(args.since_id, read_checkpoint(args.checkpoint) if args.checkpoint else 0)
+    platform = Platform(args.platform) if args.platform else None
+
+    # With a checkpoint every run exports only new posts, so earlier exports must be kept.
+    summary = export_posts(iter_new_posts(store, after_id, platform), args.destination, args.format, args.previews,
+                           incremental=bool(args.checkpoint))
+    if not summary.posts:
+        print(f"No posts after id {after_id}")
+        return 0
+    if args.checkpoint:
+        write_checkpoint(args.checkpoint, summary, summary.path)
+    print(f"Exported {summary.posts} posts (ids {summary.first_id}-{summary.last_id}) to {summary.path} "
+          f"in {summary.elapsed_s}s: {summary.images} images, {summary.duplicate_images} duplicates referenced, "
+          f"{summary.missing_images} missing, {summary.previews} previews")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+"""
+Local history of generated posts with full-text search and near-duplicate lookup.
+Every generated post is stored with its topic, platform, expertise level, research
+findings, their platform digest and images. Before generating, `find_similar` looks for posts on nearly the
+same topic so they can be reused, or their research adapted, instead of paying
+for a full research/write/image run again.
+
+Topics are compared by MinHash signatures over character shingles, indexed by
+locality-sensitive hashing (LSH) bands: a lookup is a fixed number of index probes
+plus an exact check of a few candidates, however many posts are stored. Topic
+and post text are also indexed with SQLite FTS5 for `search`.
+
+Configured through environment variables:
+    HISTORY       "off" disables the history store
+    HISTORY_PATH  SQLite file (default .cache/history.sqlite3)
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional
+from constants.content_requirements import ExpertiseLevel, Platform
+from crew.research_cache import normalize_topic
+
+# Topics at least this similar (Jaccard over shingles) are offered for reuse.
+NEAR_DUPLICATE_THRESHOLD = 0.6
+SHINGLE_CHARS = 3
+# 16 bands of 2 rows find pairs above ~0.25 similarity with high probability.
+NUM_PERM = 32
+BANDS = 16
+# A band shared by very many posts (the same topic generated over and over) only
+# contributes its newest posts as candidates.
+MAX_CANDIDATES_PER_BAND = 200
+# Candidates are checked exactly only if they share this many bands; a pair at the
+# threshold shares 16 * 0.6^2 ~ 6 bands on average and fewer than 2 almost never.
+MIN_BAND_HITS = 2
+MAX_CANDIDATES = 50
+
+_STOPWORDS = frozenset(
+    "a an and about as at by for from how in into is it of on or the to vs what why with your".split()
+)
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+_store: Optional["HistoryStore"] = None
+_store_lock = threading.Lock()
+
+
+def topic_terms(topic: str) -> List[str]:
+    """Sorted content words of a topic, so word order and plurals do not matter."""
+    terms = set()
+    for word in re.findall(r"\w+", normalize_topic(topic)):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.add(word)
+    return sorted(terms)
+
+
+def topic_key(topic: str) -> str:
+    return " ".join(topic_terms(topic))
+
+
+def topic_shingles(topic: str) -> FrozenSet[str]:
+    return _shingles(topic_key(topic))
+
+
+def _shingles(text: str) -> FrozenSet[str]:
+    if len(text) <= SHINGLE_CHARS:
+        return frozenset([text])
+    return frozenset(text[i:i + SHINGLE_CHARS] for i in range(len(text) - SHINGLE_CHARS + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingles: FrozenSet[str]) -> List[int]:
+    """`NUM_PERM` 32-bit MinHash values; stable across processes and Python versions."""
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles] or [0]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS]
+
+
+def lsh_bands(signature: List[int]) -> List[int]:
+    """One 56-bit hash per band, small enough for a signed SQLite integer."""
+    rows = NUM_PERM // BANDS
+    bands = []
+    for band in range(BANDS):
+        data = b"".join(value.to_bytes(4, "big") for value in signature[band * rows:(band + 1) * rows])
+        bands.append(int.from_bytes(hashlib.blake2b(data, digest_size=7).digest(), "big"))
+    return bands
+
+
+@dataclass
+class HistoryPost:
+    """A stored post."""
+    id: int
+    topic: str
+    platform: str
+    expertise_level: str
+    content: str
+    research_digest: str = ""
+    research: str = ""
+    image_path: Optional[str] = None
+    image_paths: List[str] = field(default_factory=list)
+    slide_paths: List[str] = field(default_factory=list)
+    created_at: float = 0.0
+
+    def as_result(self) -> Dict[str, Any]:
+        """The post in the shape `run_pipeline` returns it."""
+        return {
+            "content": self.content,
+            "image_path": self.image_path,
+            "image_paths": self.image_paths,
+            "slide_paths": self.slide_paths,
+            "history_id": self.id,
+        }
+
+
+@dataclass
+class HistoryMatch:
+    """A stored post on a nearly identical topic."""
+    post: HistoryPost
+    similarity: float
+    same_platform: bool
+    same_expertise: bool
+
+
+_COLUMNS = ("id", "topic", "platform", "expertise_level", "content", "research_digest", "research",
+            "image_path", "image_paths", "slide_paths", "created_at")
+
+
+def _row_to_post(row: tuple) -> HistoryPost:
+    data = dict(zip(_COLUMNS, row))
+    data["image_paths"] = json.loads(data["image_paths"] or "[]")
+    data["slide_paths"] = json.loads(data["slide_paths"] or "[]")
+    return HistoryPost(**data)
+
+
+class HistoryStore:
+    """
+    SQLite store of generated posts, shared by the UI, workers and batch runs.
+    Like `JobQueue`, every write is a short transaction on a per-thread connection.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS posts ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " topic TEXT NOT NULL,"
+                " topic_key TEXT NOT NULL,"
+                " platform TEXT NOT NULL,"
+                " expertise_level TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " research_digest TEXT NOT NULL DEFAULT '',"
+                " image_path TEXT,"
+                " image_paths TEXT NOT NULL DEFAULT '[]',"
+                " slide_paths TEXT NOT NULL DEFAULT '[]',"
+                " created_at REAL NOT NULL,"
+                " research TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(posts)")}
+            if "research" not in columns:
+                conn.execute("ALTER TABLE posts ADD COLUMN research TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS posts_created ON posts (created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS post_bands ("
+                " band INTEGER NOT NULL, hash INTEGER NOT NULL, post_id INTEGER NOT NULL,"
+                " PRIMARY KEY (band, hash, post_id)) WITHOUT ROWID"
+            )
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+                    " topic, content, content='posts', content_rowid='id', tokenize='porter unicode61')"
+                )
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5; `search` falls back to a table scan.
+                self.fts = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def add(self, topic: str, platform: Platform, expertise_level: ExpertiseLevel, content: str,
+            research_digest: str = "", image_path: Optional[str] = None,
+            image_paths: Optional[List[str]] = None, slide_paths: Optional[List[str]] = None,
+            research: str = "") -> int:
+        """Store a generated post and return its id; `research` is the raw findings it was written from."""
+        key = topic_key(topic)
+        bands = lsh_bands(minhash(_shingles(key)))
+        with self._transaction() as conn:
+            post_id = conn.execute(
+                "INSERT INTO posts (topic, topic_key, platform, expertise_level, content, research_digest,"
+                " research, image_path, image_paths, slide_paths, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (topic, key, platform.value, expertise_level.value, content, research_digest or "", research or "",
+                 image_path, json.dumps(image_paths or []), json.dumps(slide_paths or []), time.time())
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO post_bands (band, hash, post_id) VALUES (?, ?, ?)",
+                [(band, value, post_id) for band, value in enumerate(bands)]
+            )
+            if self.fts:
+                conn.execute("INSERT INTO posts_fts (rowid, topic, content) VALUES (?, ?, ?)",
+                             (post_id, topic, content))
+        return post_id
+
+    def get(self, post_id: int) -> Optional[HistoryPost]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM posts WHERE id = ?", (post_id,)
+        ).fetchone()
+        return _row_to_post(row) if row else None
+
+    def _fetch(self, post_ids: List[int]) -> List[HistoryPost]:
+        if not post_ids:
+            return []
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM posts WHERE id IN ({', '.join('?' * len(post_ids))})", post_ids
+        ).fetchall()
+        return [_row_to_post(row) for row in rows]
+
+    def find_similar(self, topic: str, platform: Optional[Platform] = None,
+                     expertise_level: Optional[ExpertiseLevel] = None, limit: int = 5,
+                     threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[HistoryMatch]:
+        """
+        Stored posts whose topic is a near duplicate of `topic`.
+        Args:
+            topic: Topic about to be generated
+            platform: Matches for this platform rank first
+            expertise_level: Matches for this expertise level rank next
+            limit: Maximum number of matches
+            threshold: Minimum topic similarity (0-1)
+        Returns:
+            List[HistoryMatch]: Most similar first, newer posts breaking ties
+        """
+        shingles = topic_shingles(topic)
+        conn = self._connection()
+        hits: Counter = Counter()
+        for band, value in enumerate(lsh_bands(minhash(shingles))):
+            rows = conn.execute(
+                "SELECT post_id FROM post_bands WHERE band = ? AND hash = ? ORDER BY post_id DESC LIMIT ?",
+                (band, value, MAX_CANDIDATES_PER_BAND)
+            ).fetchall()
+            hits.update(row[0] for row in rows)
+
+        candidates = [post_id for post_id, count in hits.most_common(MAX_CANDIDATES) if count >= MIN_BAND_HITS]
+        similar: Dict[int, float] = {}
+        if candidates:
+            rows = conn.execute(
+                f"SELECT id, topic_key FROM posts WHERE id IN ({', '.join('?' * len(candidates))})", candidates
+            ).fetchall()
+            for post_id, key in rows:
+                similarity = jaccard(shingles, _shingles(key))
+                if similarity >= threshold:
+                    similar[post_id] = similarity
+
+        matches = []
+        for post in self._fetch(list(similar)):
+            matches.append(HistoryMatch(
+                post=post,
+                similarity=round(similar[post.id], 3),
+                same_platform=platform is not None and post.platform == platform.value,
+                same_expertise=expertise_level is not None and post.expertise_level == expertise_level.value
+            ))
+        matches.sort(key=lambda m: (m.similarity, m.same_platform, m.same_expertise, m.post.created_at), reverse=True)
+        return matches[:limit]
+
+    def search(self, query: str, platform: Optional[Platform] = None, limit: int = 20) -> List[HistoryPost]:
+        """Full-text search over topics and post text, best matches first."""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        conn = self._connection()
+        platform_filter = " AND p.platform = ?" if platform else ""
+        params: List[Any] = [platform.value] if platform else []
+        if self.fts:
+            match = " ".join('"' + word + '"' for word in words)
+            rows = conn.execute(
+                f"SELECT {', '.join('p.' + c for c in _COLUMNS)} FROM posts_fts f JOIN posts p ON p.id = f.rowid"
+                f" WHERE posts_fts MATCH ?{platform_filter} ORDER BY bm25(posts_fts) LIMIT ?",
+                [match, *params, limit]
+            ).fetchall()
+        else:
+            like = " AND ".join("(p.topic LIKE ? OR p.content LIKE ?)" for _ in words)
+            rows = conn.execute(
+                f"SELECT {', '.join('p.' + c for c in _COLUMNS)} FROM posts p"
+                f" WHERE {like}{platform_filter} ORDER BY p.created_at DESC LIMIT ?",
+                [value for word in words for value in (f"%{word}%",) * 2] + params + [limit]
+            ).fetchall()
+        return [_row_to_post(row) for row in rows]
+
+    def recent(self, limit: int = 20) -> List[HistoryPost]:
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM posts ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [_row_to_post(row) for row in rows]
+
+    def iter_posts(self, after_id: int = 0, batch_size: int = 500) -> Iterator[HistoryPost]:
+        """
+        Yield every post with an id above `after_id` in id order, fetched `batch_size`
+        at a time by primary key, so memory stays flat however many posts are stored.
+        """
+        conn = self._connection()
+        while True:
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM posts WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+            ).fetchall()
+            for row in rows:
+                yield _row_to_post(row)
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1][0]
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Returns the process-wide history store, or None when disabled."""
+    global _store
+    if os.getenv("HISTORY", "on").lower() in ("off", "0", "false"):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(os.getenv("HISTORY_PATH", os.path.join(".cache", "history.sqlite3")))
+        return _store
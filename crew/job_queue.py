@@ -0,0 +1,234 @@
+"""
+SQLite-backed job queue between the Streamlit UI and the generation workers.
+The UI submits jobs and polls their per-stage status; worker processes
+(`python -m crew.worker`) claim queued jobs, run the pipeline and store results.
+While a job runs, partial output (the post as it is written, the image once it
+is ready) is published to the job's `partial` field. A job may carry `research`
+to reuse, e.g. from a similar post in the history store.
+
+Every write of a running job names the worker that claimed it and is dropped
+when another worker owns the job by now, e.g. after it was requeued.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_queue: Optional["JobQueue"] = None
+_queue_lock = threading.Lock()
+
+
+@dataclass
+class Job:
+    """A generation job and its progress."""
+    id: str
+    status: str
+    topic: str
+    platform: str
+    expertise_level: str
+    stages: Dict[str, str] = field(default_factory=dict)
+    partial: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    research: Optional[str] = None
+    worker: Optional[str] = None
+    attempts: int = 0
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+_COLUMNS = ("id", "status", "topic", "platform", "expertise_level", "stages", "partial", "result",
+            "error", "research", "worker", "attempts", "created_at", "updated_at")
+
+
+def _row_to_job(row: tuple) -> Job:
+    data = dict(zip(_COLUMNS, row))
+    data["stages"] = json.loads(data["stages"] or "{}")
+    data["partial"] = json.loads(data["partial"] or "{}")
+    data["result"] = json.loads(data["result"]) if data["result"] else None
+    return Job(**data)
+
+
+class JobQueue:
+    """
+    Durable FIFO of generation jobs.
+    Every method opens a short transaction, so the UI process and any number of
+    worker processes can share the same database file.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " topic TEXT NOT NULL,"
+                " platform TEXT NOT NULL,"
+                " expertise_level TEXT NOT NULL,"
+                " stages TEXT NOT NULL DEFAULT '{}',"
+                " partial TEXT NOT NULL DEFAULT '{}',"
+                " result TEXT,"
+                " error TEXT,"
+                " research TEXT,"
+                " worker TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "partial" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN partial TEXT NOT NULL DEFAULT '{}'")
+            if "research" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN research TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite connections must not be shared across threads.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def submit(self, topic: str, platform: str, expertise_level: str, research: Optional[str] = None) -> str:
+        """Queue a job and return its id. Jobs with `research` skip the researcher."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, topic, platform, expertise_level, research, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, topic, platform, expertise_level, research, now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return _row_to_job(row) if row else None
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Atomically take the oldest queued job, or return None when the queue is empty."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, worker, time.time(), row[0])
+            )
+        return self.get(row[0])
+
+    def _update_owned(self, job_id: str, worker: str, assignments: str, params: tuple) -> bool:
+        """Update a job `worker` still runs; returns False (and writes nothing) once it does not."""
+        with self._transaction() as conn:
+            return conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (*params, time.time(), job_id, worker, RUNNING)
+            ).rowcount > 0
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Mark a running job as alive, so `requeue_stale` leaves it to `worker`."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time(), job_id, worker, RUNNING)
+            ).rowcount > 0
+
+    def set_stage(self, job_id: str, worker: str, stage: str, status: str) -> bool:
+        """Record progress of one pipeline stage."""
+        return self._update_owned(job_id, worker, "stages = json_set(stages, ?, ?)", (f'$."{stage}"', status))
+
+    def set_partial(self, job_id: str, worker: str, key: str, value: Any) -> bool:
+        """Publish partial output of a running job, e.g. the post text streamed so far."""
+        return self._update_owned(
+            job_id, worker, "partial = json_set(partial, ?, json(?))", (f'$."{key}"', json.dumps(value))
+        )
+
+    def complete(self, job_id: str, worker: str, result: Dict[str, Any]) -> bool:
+        return self._update_owned(job_id, worker, "status = ?, result = ?", (DONE, json.dumps(result)))
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._update_owned(job_id, worker, "status = ?, error = ?", (FAILED, error))
+
+    def _requeue(self, where: str, params: tuple, error: str, max_attempts: int) -> int:
+        """Requeue the running jobs matching `where`, failing those that used `max_attempts`."""
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status = ? AND {where} AND attempts >= ?",
+                (FAILED, error, time.time(), RUNNING, *params, max_attempts)
+            )
+            return conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, stages = '{}', partial = '{}', updated_at = ?"
+                f" WHERE status = ? AND {where}",
+                (QUEUED, time.time(), RUNNING, *params)
+            ).rowcount
+
+    def requeue_worker(self, worker: str, max_attempts: int = 3) -> int:
+        """
+        Requeue the jobs `worker` was running, e.g. once its process exited.
+        Jobs that already used `max_attempts` are failed instead. Returns the number requeued.
+        """
+        return self._requeue("worker = ?", (worker,), "Worker exited", max_attempts)
+
+    def requeue_stale(self, timeout_s: float, max_attempts: int = 3) -> int:
+        """
+        Requeue running jobs without a heartbeat for `timeout_s`, e.g. from a worker on a lost host.
+        Jobs that already used `max_attempts` are failed instead. Returns the number requeued.
+        """
+        return self._requeue("updated_at < ?", (time.time() - timeout_s,), "Worker stopped responding", max_attempts)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def recent(self, limit: int = 20) -> List[Job]:
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue at `JOB_QUEUE_PATH` (default .cache/jobs.sqlite3)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(os.getenv("JOB_QUEUE_PATH", os.path.join(".cache", "jobs.sqlite3")))
+        return _queue
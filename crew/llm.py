@@ -0,0 +1,255 @@
+"""
+LLM factory for all agents, with token streaming and an optional on-disk response cache.
+Responses are keyed by model, normalized messages and sampling parameters, so
+development reruns and prompt regression runs replay earlier completions instead
+of calling the provider again.
+
+Configured through environment variables:
+    LLM_MODEL             Model name (default OPENAI_MODEL_NAME, MODEL or gpt-4o-mini)
+    LLM_TEMPERATURE       Sampling temperature (default: provider default)
+    OPENAI_API_BASE       Provider base URL, also read as OPENAI_BASE_URL, as crewai's own agents do
+    LLM_CACHE_MODE        "off" (default), "read_write" or "replay"
+    LLM_CACHE_PATH        SQLite file (default .cache/llm.sqlite3)
+    LLM_CACHE_MAX_ENTRIES LRU size bound (default 20000)
+    LLM_CACHE_MAX_MB      LRU disk bound in megabytes (default 512)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from crewai import LLM
+from crew.streaming import current_token_sink
+from utils.disk_cache import DiskCache
+from utils.rate_limit import get_rate_limiter
+from utils.tracing import current_span, span
+
+CACHE_MODES = ("off", "read_write", "replay")
+
+# Parameters that change the completion and therefore belong in the cache key.
+_KEY_PARAMS = (
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens",
+    "presence_penalty", "frequency_penalty", "logit_bias", "response_format", "seed",
+)
+
+_cache: Optional[DiskCache] = None
+_cache_lock = threading.Lock()
+_llm_factory: Optional[Callable[[], LLM]] = None
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a call has no recorded response."""
+
+
+class StreamInterruptedError(RuntimeError):
+    """
+    Raised when a streamed completion fails after deltas reached the token sink.
+    It is not retried, since a retry would pass the same text to the sink again.
+    """
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Keep only role and content, with trailing whitespace stripped from every line."""
+    normalized = []
+    for message in messages:
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = json.dumps(content, sort_keys=True)
+        content = "\n".join(line.rstrip() for line in content.strip().splitlines())
+        normalized.append({"role": message.get("role", "user"), "content": content})
+    return normalized
+
+
+def llm_cache_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    payload = {
+        "model": model,
+        "messages": normalize_messages(messages),
+        "params": {k: v for k, v in sorted(params.items()) if v is not None},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get_llm_cache() -> DiskCache:
+    """Returns the process-wide LLM response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(
+                path=os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm.sqlite3")),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024)
+            )
+        return _cache
+
+
+class StreamingLLM(LLM):
+    """
+    `crewai.LLM` that streams its completion when called inside `stream_tokens`,
+    passing every text delta to the active token sink. Outside a streaming
+    context it returns the whole completion like `crewai.LLM`. Both go to
+    `litellm.completion` with the parameters `crewai.LLM.call` uses, and crewai's
+    callbacks are passed to litellm per call. Every provider call goes through the
+    shared "openai" rate limiter. Calls are traced as "llm.call" spans with the
+    token usage the provider reports; when it reports none (e.g. a stand-in LLM)
+    the counts are estimated and the span is marked `tokens_estimated`.
+    Subclasses override `_complete`.
+    """
+
+    def _estimate_prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(len(str(message.get("content") or "")) for message in messages) // 4
+
+    def _estimate_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return self._estimate_prompt_tokens(messages) + (getattr(self, "max_tokens", None) or 500)
+
+    def _completion_params(self, messages: List[Dict[str, str]], stream: bool) -> Dict[str, Any]:
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "timeout": getattr(self, "timeout", None),
+            "api_base": getattr(self, "base_url", None),
+            "api_version": getattr(self, "api_version", None),
+            "api_key": getattr(self, "api_key", None),
+            "stream": stream,
+            # The final chunk of a stream then carries the usage of the whole completion.
+            "stream_options": {"include_usage": True} if stream else None,
+            **self._cache_params(),
+            **(getattr(self, "additional_params", None) or {}),
+        }
+        return {k: v for k, v in params.items() if v is not None}
+
+    @staticmethod
+    def _record_usage(usage: Any) -> None:
+        """Attach the provider-reported token usage to the current "llm.call" span."""
+        if usage is None or getattr(usage, "prompt_tokens", None) is None:
+            return
+        current_span().set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens or 0)
+
+    def _cache_params(self) -> Dict[str, Any]:
+        return {name: getattr(self, name, None) for name in _KEY_PARAMS}
+
+    def call(self, messages: List[Dict[str, str]], callbacks: List[Any] = []) -> str:
+        with span("llm.call", model=self.model) as current:
+            response = self._complete(messages, callbacks)
+            current.set(streamed=current_token_sink() is not None)
+            attributes = getattr(current, "attributes", None)
+            # Cache hits cost nothing; other calls without reported usage get an estimate.
+            if attributes is not None and "prompt_tokens" not in attributes and not attributes.get("cache_hit"):
+                current.set(
+                    prompt_tokens=self._estimate_prompt_tokens(messages),
+                    completion_tokens=len(response or "") // 4,
+                    tokens_estimated=True
+                )
+            return response
+
+    def _complete(self, messages: List[Dict[str, str]], callbacks: List[Any]) -> str:
+        limiter = get_rate_limiter("openai")
+        tokens = self._estimate_tokens(messages)
+        sink = current_token_sink()
+
+        import litellm
+
+        def complete() -> str:
+            params = self._completion_params(messages, stream=False)
+            response = litellm.completion(**params, callbacks=callbacks or None)
+            self._record_usage(getattr(response, "usage", None))
+            return response.choices[0].message.content
+
+        def stream() -> str:
+            new_completion = getattr(sink, "new_completion", None)
+            if new_completion is not None:
+                new_completion()
+            # Failures before the first delta are retried by the rate limiter; once text
+            # reached the sink the error is wrapped so it is not, and nothing repeats.
+            parts = []
+            try:
+                for chunk in litellm.completion(**self._completion_params(messages, stream=True),
+                                                callbacks=callbacks or None):
+                    self._record_usage(getattr(chunk, "usage", None))
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        sink(delta)
+            except Exception as e:
+                if not parts:
+                    raise
+                raise StreamInterruptedError(f"Stream failed after {len(parts)} deltas: {type(e).__name__}: {e}") from e
+            return "".join(parts)
+
+        return limiter.call(complete if sink is None else stream, tokens=tokens)
+
+
+class CachedLLM(StreamingLLM):
+    """
+    `StreamingLLM` that serves completions from a `DiskCache`.
+    In "read_write" mode misses go to the provider and are stored; in "replay"
+    mode a miss raises `LLMCacheMissError` instead of calling the provider.
+    A cache hit is passed to the token sink in one piece.
+    """
+
+    def __init__(self, *args, cache_mode: str = "read_write", cache: Optional[DiskCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {cache_mode}")
+        self.cache_mode = cache_mode
+        self.cache = cache
+
+    def _complete(self, messages: List[Dict[str, str]], callbacks: List[Any]) -> str:
+        if self.cache_mode == "off":
+            return super()._complete(messages, callbacks)
+
+        cache = self.cache or get_llm_cache()
+        key = llm_cache_key(self.model, messages, self._cache_params())
+        cached = cache.get(key)
+        current_span().set(cache_hit=cached is not None)
+        if cached is not None:
+            sink = current_token_sink()
+            if sink is not None:
+                new_completion = getattr(sink, "new_completion", None)
+                if new_completion is not None:
+                    new_completion()
+                sink(cached)
+            return cached
+        if self.cache_mode == "replay":
+            raise LLMCacheMissError(f"No cached response for {self.model} call {key[:12]} in replay mode")
+
+        response = super()._complete(messages, callbacks)
+        if response:
+            cache.set(key, response)
+        return response
+
+
+def set_llm_factory(factory: Optional[Callable[[], LLM]]) -> None:
+    """Build every agent's LLM with `factory` instead, e.g. a local stand-in for benchmarks."""
+    global _llm_factory
+    _llm_factory = factory
+
+
+def llm_params_from_env() -> Dict[str, Any]:
+    """
+    Model settings from the environment, resolved the way crewai resolves them for an
+    agent without an explicit LLM, so building the LLM here changes nothing for
+    deployments that configure the provider through environment variables.
+    """
+    params: Dict[str, Any] = {
+        "model": os.getenv("LLM_MODEL") or os.getenv("OPENAI_MODEL_NAME") or os.getenv("MODEL") or "gpt-4o-mini"
+    }
+    base_url = os.getenv("OPENAI_API_BASE") or os.getenv("OPENAI_BASE_URL")
+    if base_url:
+        params["base_url"] = base_url
+    if os.getenv("OPENAI_API_KEY"):
+        params["api_key"] = os.getenv("OPENAI_API_KEY")
+    if os.getenv("LLM_TEMPERATURE"):
+        params["temperature"] = float(os.getenv("LLM_TEMPERATURE"))
+    return params
+
+
+def get_llm() -> LLM:
+    """Returns the LLM used by every agent, cached according to `LLM_CACHE_MODE`."""
+    if _llm_factory is not None:
+        return _llm_factory()
+    params = llm_params_from_env()
+    cache_mode = os.getenv("LLM_CACHE_MODE", "off").lower()
+    if cache_mode == "off":
+        return StreamingLLM(**params)
+    return CachedLLM(cache_mode=cache_mode, **params)
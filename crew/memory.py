@@ -0,0 +1,289 @@
+"""
+Bounded, pluggable memory for the crews and agents.
+CrewAI's default memory keeps growing embedding stores on disk and embeds every
+task. This module replaces it with stores that hold at most `max_items` entries
+no older than `max_age_s`, kept in process or in SQLite, and that count
+embedding calls and store size so memory cost can be measured and capped.
+
+Memory is off by default, as it is for a plain `Crew`. Enabling it costs an
+extra evaluator LLM call per task and memory context in every prompt. The
+stores are shared by every job in the process, so context from other topics
+can reach a prompt. Recalled context also varies from run to run, which makes
+LLM cache keys (and "replay" mode) non-deterministic.
+
+Configured through environment variables:
+    AGENT_MEMORY            "none" (default), "memory" (in-process) or "disk"
+    AGENT_MEMORY_PATH       SQLite file for the disk backend (default .cache/memory.sqlite3)
+    AGENT_MEMORY_MAX_ITEMS  Entries kept per memory kind (default 200)
+    AGENT_MEMORY_MAX_AGE_H  Entry lifetime in hours (default 24)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+MEMORY_BACKENDS = ("none", "memory", "disk")
+
+_config_override: Optional["MemoryConfig"] = None
+_storages: Dict[Tuple[str, str], "BoundedMemoryStorage"] = {}
+_storages_lock = threading.Lock()
+
+_TOKEN = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class MemoryConfig:
+    """Which memory backend the crews use and how large it may grow."""
+    backend: str = "none"
+    path: str = os.path.join(".cache", "memory.sqlite3")
+    max_items: int = 200
+    max_age_s: Optional[float] = 24 * 3600
+
+    def __post_init__(self):
+        if self.backend not in MEMORY_BACKENDS:
+            raise ValueError(f"Unknown memory backend: {self.backend}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "none"
+
+    @classmethod
+    def from_env(cls) -> "MemoryConfig":
+        max_age_h = float(os.getenv("AGENT_MEMORY_MAX_AGE_H", "24"))
+        return cls(
+            backend=os.getenv("AGENT_MEMORY", "none").lower(),
+            path=os.getenv("AGENT_MEMORY_PATH", os.path.join(".cache", "memory.sqlite3")),
+            max_items=int(os.getenv("AGENT_MEMORY_MAX_ITEMS", "200")),
+            max_age_s=max_age_h * 3600 if max_age_h > 0 else None,
+        )
+
+
+def get_memory_config() -> MemoryConfig:
+    """Returns the active memory configuration: an explicit override or the environment."""
+    return _config_override or MemoryConfig.from_env()
+
+
+def set_memory_config(config: Optional[MemoryConfig]) -> None:
+    """Override the environment configuration for this process, e.g. from a batch CLI flag."""
+    global _config_override
+    _config_override = config
+
+
+@dataclass
+class MemoryStats:
+    saves: int = 0
+    searches: int = 0
+    embedding_calls: int = 0
+    evictions: int = 0
+    items: int = 0
+    size_bytes: int = 0
+
+
+@dataclass
+class _Entry:
+    value: str
+    metadata: Dict[str, Any]
+    created_at: float
+    tokens: frozenset = field(default_factory=frozenset)
+    embedding: Optional[List[float]] = None
+
+
+def _tokens(text: str) -> frozenset:
+    return frozenset(token.lower() for token in _TOKEN.findall(text))
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = (sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5)
+    return dot / norm if norm else 0.0
+
+
+class BoundedMemoryStorage:
+    """
+    Size- and age-bounded store implementing CrewAI's storage interface
+    (`save`, `search`, `reset`). Without an `embedder` it ranks entries by token
+    overlap, so no embedding calls are made at all.
+    Args:
+        kind: Memory kind sharing this store, e.g. "short_term" or "entity"
+        config: Backend, location and limits
+        embedder: Optional text-to-vector function; every call is counted
+    """
+
+    def __init__(self, kind: str, config: MemoryConfig,
+                 embedder: Optional[Callable[[str], List[float]]] = None):
+        self.kind = kind
+        self.config = config
+        self.embedder = embedder
+        self.stats = MemoryStats()
+        self._lock = threading.Lock()
+        self._entries: Deque[_Entry] = deque()
+        self._conn: Optional[sqlite3.Connection] = None
+        if config.backend == "disk":
+            directory = os.path.dirname(config.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(config.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " kind TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " embedding TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS memory_kind ON memory (kind, created_at)")
+            self._load()
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        if self.embedder is None:
+            return None
+        self.stats.embedding_calls += 1
+        return self.embedder(text)
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT value, metadata, embedding, created_at FROM memory WHERE kind = ? ORDER BY id", (self.kind,)
+        ).fetchall()
+        for value, metadata, embedding, created_at in rows:
+            self._entries.append(_Entry(
+                value=value,
+                metadata=json.loads(metadata),
+                created_at=created_at,
+                tokens=_tokens(value),
+                embedding=json.loads(embedding) if embedding else None,
+            ))
+        self._evict(time.time())
+
+    def _evict(self, now: float) -> None:
+        evicted = 0
+        max_age_s = self.config.max_age_s
+        while self._entries and (
+            len(self._entries) > self.config.max_items
+            or (max_age_s is not None and now - self._entries[0].created_at > max_age_s)
+        ):
+            self._entries.popleft()
+            evicted += 1
+        if evicted and self._conn is not None:
+            self._conn.execute(
+                "DELETE FROM memory WHERE kind = ? AND id NOT IN ("
+                " SELECT id FROM memory WHERE kind = ? ORDER BY id DESC LIMIT ?)",
+                (self.kind, self.kind, len(self._entries))
+            )
+        self.stats.evictions += evicted
+
+    def save(self, value: Any, metadata: Optional[Dict[str, Any]] = None) -> None:
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        entry = _Entry(
+            value=text,
+            metadata=dict(metadata or {}),
+            created_at=time.time(),
+            tokens=_tokens(text),
+            embedding=self._embed(text),
+        )
+        with self._lock:
+            self._entries.append(entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO memory (kind, value, metadata, embedding, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.kind, entry.value, json.dumps(entry.metadata, default=str),
+                     json.dumps(entry.embedding) if entry.embedding else None, entry.created_at)
+                )
+            self.stats.saves += 1
+            self._evict(entry.created_at)
+
+    def search(self, query: str, limit: int = 3, score_threshold: float = 0.35) -> List[Dict[str, Any]]:
+        query_embedding = self._embed(query)
+        query_tokens = _tokens(query)
+        with self._lock:
+            self.stats.searches += 1
+            self._evict(time.time())
+            scored = []
+            for index, entry in enumerate(self._entries):
+                if query_embedding is not None and entry.embedding is not None:
+                    score = _cosine(query_embedding, entry.embedding)
+                elif query_tokens:
+                    score = len(query_tokens & entry.tokens) / len(query_tokens)
+                else:
+                    score = 0.0
+                if score >= score_threshold:
+                    scored.append((score, index, entry))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [
+            {"id": str(index), "context": entry.value, "metadata": entry.metadata, "score": round(score, 4)}
+            for score, index, entry in scored[:limit]
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM memory WHERE kind = ?", (self.kind,))
+
+    def snapshot(self) -> MemoryStats:
+        """Counters plus the current number of entries and their size in bytes."""
+        with self._lock:
+            return MemoryStats(
+                saves=self.stats.saves,
+                searches=self.stats.searches,
+                embedding_calls=self.stats.embedding_calls,
+                evictions=self.stats.evictions,
+                items=len(self._entries),
+                size_bytes=sum(len(entry.value.encode("utf-8")) for entry in self._entries),
+            )
+
+
+class BoundedLongTermStorage:
+    """Adapter giving a `BoundedMemoryStorage` the interface of CrewAI's long-term SQLite storage."""
+
+    def __init__(self, storage: BoundedMemoryStorage):
+        self.storage = storage
+
+    def save(self, task_description: str, metadata: Dict[str, Any], datetime: str, score: float) -> None:
+        self.storage.save(task_description, {"metadata": metadata, "datetime": datetime, "score": score})
+
+    def load(self, task_description: str, latest_n: int) -> Optional[List[Dict[str, Any]]]:
+        results = self.storage.search(task_description, limit=latest_n, score_threshold=1.0)
+        return [result["metadata"] for result in results] or None
+
+    def reset(self) -> None:
+        self.storage.reset()
+
+
+def get_memory_storage(kind: str, config: Optional[MemoryConfig] = None) -> BoundedMemoryStorage:
+    """Returns the process-wide store for a memory kind, so limits apply across all crews."""
+    config = config or get_memory_config()
+    key = (kind, config.backend)
+    with _storages_lock:
+        if key not in _storages or _storages[key].config != config:
+            _storages[key] = BoundedMemoryStorage(kind, config)
+        return _storages[key]
+
+
+def crew_memory_kwargs(config: Optional[MemoryConfig] = None) -> Dict[str, Any]:
+    """Keyword arguments that configure a `Crew`'s memory according to `config`."""
+    config = config or get_memory_config()
+    if not config.enabled:
+        return {"memory": False}
+
+    from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
+
+    return {
+        "memory": True,
+        "short_term_memory": ShortTermMemory(storage=get_memory_storage("short_term", config)),
+        "entity_memory": EntityMemory(storage=get_memory_storage("entity", config)),
+        "long_term_memory": LongTermMemory(storage=BoundedLongTermStorage(get_memory_storage("long_term", config))),
+    }
+
+
+def memory_stats() -> Dict[str, Dict[str, int]]:
+    """Per-store counters: saves, searches, embedding calls, evictions, items and bytes."""
+    with _storages_lock:
+        storages = list(_storages.items())
+    return {f"{kind}:{backend}": vars(storage.snapshot()) for (kind, backend), storage in storages}
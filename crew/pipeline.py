@@ -0,0 +1,366 @@
+"""
+Content generation pipeline shared by the Streamlit app and headless runners.
+Every call builds its own tasks and checks agents out of the shared agent pool
+for exclusive use, so several generations can run concurrently without sharing
+task or agent state.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from crewai import Agent, Crew, Process
+from crewai.crews.crew_output import CrewOutput
+from constants.content_requirements import (
+    Platform,
+    ExpertiseLevel,
+)
+from crew.agent_pool import get_agent_pool
+from crew.history import get_history_store
+from crew.digest import ResearchDigest, build_digest, digest_enabled, estimate_tokens
+from crew.memory import crew_memory_kwargs
+from crew.tasks.image_designing import get_image_design_task
+from crew.tasks.research import get_research_task
+from crew.tasks.writing import create_revision_task, create_writing_task
+from crew.post_format import repair_post
+from crew.research_cache import get_research_cache, research_cache_key
+from crew.scheduler import StageScheduler
+from crew.streaming import FinalAnswerFilter, stream_tokens
+from utils.image_derivatives import DerivedImages, derive_images
+from utils.preview_renderer import split_carousel
+from utils.tracing import record_span, span, tracing_enabled
+
+logger = logging.getLogger(__name__)
+
+
+def _crew_inputs(topic: str, platform: Platform, expertise_level: ExpertiseLevel) -> Dict[str, Any]:
+    return {
+        "topic": topic,
+        "expertise_level": expertise_level.value,
+        "social_platform": platform.value
+    }
+
+
+def _build_content_crew(research_agent: Agent, writer_agent: Agent,
+                        platform: Platform, expertise_level: ExpertiseLevel) -> Crew:
+    writing_task = create_writing_task(
+        platform=platform,
+        expertise_level=expertise_level,
+        writer_agent=writer_agent
+    )
+
+    return Crew(
+        agents=[research_agent, writer_agent],
+        tasks=[get_research_task(research_agent), writing_task],
+        process=Process.sequential,
+        verbose=True,
+        **crew_memory_kwargs()
+    )
+
+
+def _build_image_crew(image_agent: Agent) -> Crew:
+    return Crew(
+        agents=[image_agent],
+        tasks=[get_image_design_task(image_agent)],
+        process=Process.sequential,
+        **crew_memory_kwargs()
+    )
+
+
+@contextmanager
+def _traced_kickoff(crew: Crew, name: str):
+    """
+    Trace a crew kickoff as a "crew" span. Sequential crews report each finished
+    task through `task_callback`; a task span covers the time since the previous one.
+    """
+    if not tracing_enabled():
+        yield
+        return
+    last = [time.perf_counter()]
+
+    def on_task(output: Any) -> None:
+        now = time.perf_counter()
+        record_span(
+            "task", now - last[0], crew=name,
+            agent=str(getattr(output, "agent", "") or ""),
+            task=(getattr(output, "name", None) or getattr(output, "description", "") or "")[:80]
+        )
+        last[0] = now
+
+    crew.task_callback = on_task
+    with span("crew", crew=name, tasks=len(crew.tasks)):
+        yield
+
+
+def initialize_crew(topic: str, platform: Platform, expertise_level: ExpertiseLevel) -> CrewOutput:
+    """Initialize and run the CrewAI workflow with given parameters."""
+    pool = get_agent_pool()
+    with pool.checkout("researcher", "trading") as research_agent, pool.checkout("writer") as writer_agent:
+        crew = _build_content_crew(research_agent, writer_agent, platform, expertise_level)
+        with _traced_kickoff(crew, "content"):
+            return crew.kickoff(inputs=_crew_inputs(topic, platform, expertise_level))
+
+
+async def initialize_crew_async(topic: str, platform: Platform, expertise_level: ExpertiseLevel) -> CrewOutput:
+    """Async variant of `initialize_crew` built on `Crew.kickoff_async`."""
+    pool = get_agent_pool()
+    with pool.checkout("researcher", "trading") as research_agent, pool.checkout("writer") as writer_agent:
+        crew = _build_content_crew(research_agent, writer_agent, platform, expertise_level)
+        with _traced_kickoff(crew, "content"):
+            return await crew.kickoff_async(inputs=_crew_inputs(topic, platform, expertise_level))
+
+
+def generate_image(topic: str, platform: Platform, expertise_level: ExpertiseLevel, content: Any) -> CrewOutput:
+    """Run the image design crew for already generated content."""
+    inputs = _crew_inputs(topic, platform, expertise_level)
+    inputs["content"] = content
+    with get_agent_pool().checkout("image_designer") as image_agent:
+        crew = _build_image_crew(image_agent)
+        with _traced_kickoff(crew, "image"):
+            return crew.kickoff(inputs=inputs)
+
+
+async def generate_image_async(topic: str, platform: Platform, expertise_level: ExpertiseLevel, content: Any) -> CrewOutput:
+    """Async variant of `generate_image`."""
+    inputs = _crew_inputs(topic, platform, expertise_level)
+    inputs["content"] = content
+    with get_agent_pool().checkout("image_designer") as image_agent:
+        crew = _build_image_crew(image_agent)
+        with _traced_kickoff(crew, "image"):
+            return await crew.kickoff_async(inputs=inputs)
+
+
+def parse_image_path(image_result: Any) -> str:
+    """Extract the single image path returned by the image design task."""
+    raw = getattr(image_result, "raw", image_result)
+    image_path = str(raw).strip()
+    if image_path.startswith('- '):
+        image_path = image_path[2:]
+    return image_path
+
+
+def derive_post_images(platform: Platform, image_path: str, content: str) -> DerivedImages:
+    """
+    Derive the platform-sized image, and for Instagram one background variant and
+    one rendered slide per carousel slide, from a single generated image.
+    """
+    slides = split_carousel(content)[0] if platform == Platform.INSTAGRAM else None
+    return derive_images(image_path, platform, slides)
+
+
+def run_research(topic: str, domain_category: str = "trading") -> str:
+    """
+    Run the research task on its own and return its findings.
+    Findings are served from the research cache when the same topic was
+    researched against the same source domains recently.
+    """
+    cache = get_research_cache()
+    key = research_cache_key(topic, domain_category)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    with get_agent_pool().checkout("researcher", domain_category) as research_agent:
+        crew = Crew(
+            agents=[research_agent],
+            tasks=[get_research_task(research_agent)],
+            process=Process.sequential,
+            verbose=True,
+            **crew_memory_kwargs()
+        )
+        with _traced_kickoff(crew, "research"):
+            findings = str(crew.kickoff(inputs={"topic": topic}))
+    if cache is not None:
+        cache.set(key, findings)
+    return findings
+
+
+def digest_research(topic: str, platform: Platform, research: str) -> ResearchDigest:
+    """Compact research findings to the writer budget of `platform`; see `crew.digest`."""
+    if not digest_enabled():
+        tokens = estimate_tokens(research)
+        return ResearchDigest(text=research, facts=[], original_tokens=tokens, digest_tokens=tokens)
+    return build_digest(research, platform, topic)
+
+
+def write_post(topic: str, platform: Platform, expertise_level: ExpertiseLevel, research: str,
+               on_token: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Run the writing task for one platform/expertise level from existing research.
+    When `on_token` is given, the post is streamed to it delta by delta while it is written.
+    The draft is checked and repaired locally against the platform format rules; the
+    writer is only asked for a revision when local repair is not enough.
+    """
+    inputs = _crew_inputs(topic, platform, expertise_level)
+    inputs["research"] = research
+    with get_agent_pool().checkout("writer") as writer_agent:
+        writing_task = create_writing_task(
+            platform=platform,
+            expertise_level=expertise_level,
+            writer_agent=writer_agent,
+            include_research=True
+        )
+        crew = Crew(
+            agents=[writer_agent],
+            tasks=[writing_task],
+            process=Process.sequential,
+            verbose=True,
+            **crew_memory_kwargs()
+        )
+        with stream_tokens(FinalAnswerFilter(on_token) if on_token else None), _traced_kickoff(crew, "writing"):
+            draft = str(crew.kickoff(inputs=inputs))
+
+        report = repair_post(platform, draft)
+        if report.valid:
+            return report.content
+        revision = Crew(
+            agents=[writer_agent],
+            tasks=[create_revision_task(platform, writer_agent)],
+            process=Process.sequential,
+            verbose=True,
+            **crew_memory_kwargs()
+        )
+        inputs.update(draft=report.content, issues="\n".join(f"- The post {issue}" for issue in report.issues))
+        with _traced_kickoff(revision, "revision"):
+            revised = str(revision.kickoff(inputs=inputs))
+        # Whatever the revision still gets wrong is repaired as far as possible and kept.
+        return repair_post(platform, revised).content
+
+
+def run_multi_platform(
+    topic: str,
+    targets: List[Tuple[Platform, ExpertiseLevel]],
+    with_image: bool = True,
+    domain_category: str = "trading",
+    on_event: Optional[Callable[[str, str], None]] = None,
+    on_token: Optional[Callable[[str, str], None]] = None,
+    on_output: Optional[Callable[[str, Any], None]] = None,
+    research: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Research a topic once and generate posts for several platforms/expertise levels.
+    The findings are compacted once per platform ("digest:..." stages) and writing for
+    every target starts as soon as its digest is ready, in parallel; image design does
+    not need the finished text, so it starts right away. Once both are done, the
+    "derive:..." stage crops the image to the platform size and renders carousel
+    slides locally. Wall-clock time is roughly research plus the slowest writing branch.
+    Returns:
+        dict: `research`, `results` (one dict per target with `platform`,
+        `expertise_level`, `content`, `image_path`, `image_paths` with one background
+        per slide, rendered `slide_paths` and `digest` token stats) and per-stage `timings`
+    `on_event(stage, status)` receives stage progress and `on_output(stage, output)`
+    each finished stage's output, see `StageScheduler`. `on_token(stage, delta)`
+    receives the posts of the "write:..." stages as they are generated.
+    Passing `research`, e.g. the findings of a similar post from the history store,
+    skips the researcher. Every post is saved to the history store (`history_id`,
+    None when saving failed; the generated post is returned either way).
+    """
+    targets = list(dict.fromkeys(targets))
+    scheduler = StageScheduler(on_event=on_event, on_output=on_output)
+    scheduler.add("research", lambda _: research if research is not None else run_research(topic, domain_category))
+    for platform in dict.fromkeys(platform for platform, _ in targets):
+        scheduler.add(
+            f"digest:{platform.value}",
+            lambda deps, p=platform: digest_research(topic, p, deps["research"]),
+            depends_on=["research"]
+        )
+
+    for platform, expertise_level in targets:
+        suffix = f"{platform.value}:{expertise_level.value}"
+        stage = f"write:{suffix}"
+        stream = (lambda delta, s=stage: on_token(s, delta)) if on_token else None
+        scheduler.add(
+            stage,
+            lambda deps, p=platform, e=expertise_level, cb=stream: write_post(
+                topic, p, e, deps[f"digest:{p.value}"].text, cb
+            ),
+            depends_on=[f"digest:{platform.value}"]
+        )
+        if with_image:
+            scheduler.add(
+                f"image:{suffix}",
+                lambda _, p=platform, e=expertise_level: parse_image_path(generate_image(topic, p, e, "")),
+            )
+            scheduler.add(
+                f"derive:{suffix}",
+                lambda deps, p=platform, s=suffix: derive_post_images(p, deps[f"image:{s}"], deps[f"write:{s}"]),
+                depends_on=[f"image:{suffix}", f"write:{suffix}"]
+            )
+
+    with span("pipeline", topic=topic, targets=len(targets), with_image=with_image):
+        schedule = scheduler.run()
+    history = get_history_store()
+    results = []
+    for platform, expertise_level in targets:
+        suffix = f"{platform.value}:{expertise_level.value}"
+        images = schedule.outputs.get(f"derive:{suffix}") or DerivedImages(image_path=None)
+        digest = schedule.outputs[f"digest:{platform.value}"]
+        history_id = None
+        if history is not None:
+            try:
+                history_id = history.add(
+                    topic, platform, expertise_level, schedule.outputs[f"write:{suffix}"],
+                    research_digest=digest.text, image_path=images.image_path,
+                    image_paths=images.backgrounds, slide_paths=images.slides,
+                    research=schedule.outputs["research"]
+                )
+            except Exception:
+                logger.exception("Could not save the %s post on %r to the history store", suffix, topic)
+        results.append({
+            "platform": platform.value,
+            "expertise_level": expertise_level.value,
+            "content": schedule.outputs[f"write:{suffix}"],
+            "image_path": images.image_path,
+            "image_paths": images.backgrounds,
+            "slide_paths": images.slides,
+            "digest": digest.stats(),
+            "history_id": history_id,
+        })
+    return {
+        "research": schedule.outputs["research"],
+        "results": results,
+        "timings": schedule.timings,
+    }
+
+
+def run_pipeline(
+    topic: str,
+    platform: Platform,
+    expertise_level: ExpertiseLevel,
+    with_image: bool = True,
+    domain_category: str = "trading",
+    on_event: Optional[Callable[[str, str], None]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    on_output: Optional[Callable[[str, Any], None]] = None,
+    research: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run content and image generation for a single topic.
+    Image design runs alongside research and writing; `on_token(delta)` receives
+    the post as it is written. Existing `research` skips the researcher.
+    Returns:
+        dict: `content` with the generated post, `image_path` (None when skipped),
+        carousel `image_paths`/`slide_paths`, `digest` with the tokens the research
+        digest saved in the writer prompt and the post's `history_id`
+    """
+    output = run_multi_platform(
+        topic, [(platform, expertise_level)], with_image=with_image,
+        domain_category=domain_category, on_event=on_event, on_output=on_output,
+        on_token=(lambda _, delta: on_token(delta)) if on_token else None,
+        research=research
+    )
+    result = output["results"][0]
+    return {key: result[key] for key in ("content", "image_path", "image_paths", "slide_paths", "digest", "history_id")}
+
+
+async def run_pipeline_async(
+    topic: str,
+    platform: Platform,
+    expertise_level: ExpertiseLevel,
+    with_image: bool = True,
+    domain_category: str = "trading"
+) -> Dict[str, Any]:
+    """Async variant of `run_pipeline`; the stage graph runs on worker threads."""
+    return await asyncio.to_thread(run_pipeline, topic, platform, expertise_level, with_image, domain_category)
@@ -0,0 +1,278 @@
+"""
+Deterministic format validation and repair of writer output.
+Checks the hard rules in `PLATFORM_RULES` (no markdown, tweet length, number of
+tweets or slides, hashtag placement) and fixes what can be fixed locally:
+markdown is stripped, tweets are split or joined to the length limit and
+renumbered, and hashtags are moved to where the platform expects them. Only a
+post that still breaks a rule after repair needs an LLM revision.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from constants.content_requirements import Platform, PLATFORM_RULES
+from utils.preview_renderer import split_carousel, split_thread, strip_numbering
+
+_MD_HEADER = re.compile(r"^[ \t]{0,3}#{1,6}[ \t]+", re.M)
+_MD_BOLD = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1", re.S)
+_MD_ITALIC = re.compile(r"(?<![\w*])\*(?=\S)([^*\n]+?)(?<=\S)\*(?![\w*])|(?<![\w_])_(?=\S)([^_\n]+?)(?<=\S)_(?![\w_])")
+_MD_LINK = re.compile(r"\[([^\]\n]+)\]\((\S+?)\)")
+_MD_CODE = re.compile(r"`{1,3}([^`]*)`{1,3}")
+_MD_BULLET = re.compile(r"^([ \t]*)[*+][ \t]+", re.M)
+_MD_RULE = re.compile(r"^[ \t]*(?:[*_][ \t]*){3,}$\n?", re.M)
+_HASHTAG = re.compile(r"#\w+")
+_TRAILING_HASHTAGS = re.compile(r"(?:\s*#\w+)+\s*$")
+_HASHTAG_LINE = re.compile(r"^[ \t]*(?:#\w+[ \t]*)+$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class FormatReport:
+    """A post after local repair, what was changed and which rules it still breaks."""
+    content: str
+    repairs: List[str] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.issues
+
+
+def strip_markdown(text: str) -> str:
+    """Remove markdown syntax but keep the text; `*`/`+` bullets become "•"."""
+    text = _MD_RULE.sub("", text)
+    text = _MD_HEADER.sub("", text)
+    text = _MD_LINK.sub(r"\1 (\2)", text)
+    text = _MD_CODE.sub(r"\1", text)
+    text = _MD_BULLET.sub(r"\1• ", text)
+    text = _MD_BOLD.sub(r"\2", text)
+    return _MD_ITALIC.sub(lambda m: m.group(1) or m.group(2), text)
+
+
+def _peel_hashtags(text: str) -> Tuple[str, List[str]]:
+    """Split trailing hashtags off a text."""
+    match = _TRAILING_HASHTAGS.search(text)
+    if not match or not match.group().strip():
+        return text, []
+    return text[:match.start()].rstrip(), _HASHTAG.findall(match.group())
+
+
+def _sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END.split(text.strip()) if s]
+
+
+def _chunk(text: str, limit: int) -> List[str]:
+    """Split text into pieces of at most `limit` characters, at sentence then word boundaries."""
+    pieces: List[str] = []
+    current = ""
+    for unit in _sentences(text):
+        words = [unit] if len(unit) <= limit else unit.split()
+        for word in words:
+            while len(word) > limit:
+                # A single unbreakable token (e.g. a long URL) is cut hard.
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(word[:limit])
+                word = word[limit:]
+            candidate = f"{current} {word}" if current else word
+            if len(candidate) <= limit:
+                current = candidate
+            else:
+                pieces.append(current)
+                current = word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _merge_items(items: List[str], max_items: int, limit: Optional[int] = None) -> List[str]:
+    """Join the shortest adjacent pairs until at most `max_items` remain (within `limit`)."""
+    items = list(items)
+    while len(items) > max_items:
+        pairs = [(len(items[i]) + len(items[i + 1]), i) for i in range(len(items) - 1)]
+        pairs = [(size, i) for size, i in pairs if limit is None or size + 1 <= limit]
+        if not pairs:
+            break
+        _, i = min(pairs)
+        items[i:i + 2] = [f"{items[i]} {items[i + 1]}"]
+    return items
+
+
+def _split_items(items: List[str], min_items: int) -> List[str]:
+    """Split the longest multi-sentence items in two until at least `min_items` exist."""
+    items = list(items)
+    while len(items) < min_items:
+        candidates = [(len(item), i) for i, item in enumerate(items) if len(_sentences(item)) >= 2]
+        if not candidates:
+            break
+        _, i = max(candidates)
+        sentences = _sentences(items[i])
+        total = sum(len(s) for s in sentences)
+        cut, running = 1, len(sentences[0])
+        while cut < len(sentences) - 1 and running + len(sentences[cut]) <= total / 2:
+            running += len(sentences[cut])
+            cut += 1
+        items[i:i + 1] = [" ".join(sentences[:cut]), " ".join(sentences[cut:])]
+    return items
+
+
+def _fit_count(items: List[str], rules: Dict[str, Any], limit: Optional[int], repairs: List[str], noun: str) -> List[str]:
+    count = len(items)
+    items = _merge_items(items, rules["max_items"], limit)
+    if len(items) < count:
+        repairs.append(f"joined {noun}s ({count} -> {len(items)})")
+    count = len(items)
+    items = _split_items(items, rules["min_items"])
+    if len(items) > count:
+        repairs.append(f"split {noun}s ({count} -> {len(items)})")
+    return items
+
+
+def _check_count(items: List[Any], rules: Dict[str, Any], noun: str, issues: List[str]) -> None:
+    if not rules["min_items"] <= len(items) <= rules["max_items"]:
+        issues.append(f"has {len(items)} {noun}s, needs {rules['min_items']}-{rules['max_items']}")
+
+
+def validate_post(platform: Platform, content: str) -> List[str]:
+    """
+    Check a post against the hard rules of its platform.
+    Returns:
+        list: Human-readable descriptions of every broken rule (empty when valid)
+    """
+    rules = PLATFORM_RULES[platform.value]
+    issues: List[str] = []
+    if not content.strip():
+        return ["is empty"]
+    if strip_markdown(content) != content:
+        issues.append("contains markdown formatting")
+
+    if platform == Platform.TWITTER:
+        tweets = split_thread(content)
+        _check_count(tweets, rules, "tweet", issues)
+        for i, tweet in enumerate(tweets, 1):
+            if len(tweet) > rules["max_chars"]:
+                issues.append(f"tweet {i} has {len(tweet)} characters, limit is {rules['max_chars']}")
+            if i < len(tweets) and _peel_hashtags(strip_numbering(tweet))[1]:
+                issues.append(f"tweet {i} ends in hashtags; they belong in the final tweet")
+        numbers = [re.match(r"\s*(\d+)", tweet) for tweet in tweets]
+        if not all(m and int(m.group(1)) == i for i, m in enumerate(numbers, 1)):
+            issues.append("thread is not numbered in sequence")
+    elif platform == Platform.INSTAGRAM:
+        slides, _ = split_carousel(content)
+        _check_count(slides, rules, "slide", issues)
+        if any(_peel_hashtags(slide)[1] for slide in slides):
+            issues.append("slides end in hashtags; they belong in the trailing hashtag block")
+    else:
+        if len(content) > rules["max_chars"]:
+            issues.append(f"has {len(content)} characters, limit is {rules['max_chars']}")
+        lines = content.strip().splitlines()
+        body = [line for line in lines[:-1] if _HASHTAG_LINE.match(line)]
+        if body:
+            issues.append("has hashtag lines before the end of the post")
+    return issues
+
+
+def _repair_thread(content: str, rules: Dict[str, Any], repairs: List[str]) -> str:
+    limit = rules["max_chars"]
+    # Room for the "n/m " prefix added when the thread is renumbered.
+    body_limit = limit - len(f"{rules['max_items']}/{rules['max_items']} ")
+    tweets: List[str] = []
+    hashtags: List[str] = []
+    items = [strip_numbering(tweet).strip() for tweet in split_thread(content)]
+    for i, tweet in enumerate(items):
+        tweet, tags = _peel_hashtags(tweet)
+        if tags and i < len(items) - 1:
+            repairs.append("moved hashtags to the final tweet")
+        hashtags.extend(tags)
+        if tweet:
+            tweets.append(tweet)
+
+    split: List[str] = []
+    for tweet in tweets:
+        if len(tweet) > body_limit:
+            repairs.append("split an over-long tweet")
+            split.extend(_chunk(tweet, body_limit))
+        else:
+            split.append(tweet)
+    tweets = _fit_count(split, rules, body_limit, repairs, "tweet")
+
+    tags = " ".join(dict.fromkeys(hashtags))
+    if tags and tweets:
+        if len(tweets[-1]) + 2 + len(tags) <= body_limit:
+            tweets[-1] = f"{tweets[-1]}\n\n{tags}"
+        elif len(tweets) < rules["max_items"] and len(tags) <= body_limit:
+            tweets.append(tags)
+        else:
+            kept = []
+            for tag in dict.fromkeys(hashtags):
+                if len(tweets[-1]) + 2 + len(" ".join(kept + [tag])) <= body_limit:
+                    kept.append(tag)
+            repairs.append(f"dropped {len(dict.fromkeys(hashtags)) - len(kept)} hashtags to fit the final tweet")
+            if kept:
+                tweets[-1] = f"{tweets[-1]}\n\n{' '.join(kept)}"
+
+    repairs.append("renumbered the thread")
+    total = len(tweets)
+    return "\n\n".join(f"{i}/{total} {tweet}" for i, tweet in enumerate(tweets, 1))
+
+
+def _repair_carousel(content: str, rules: Dict[str, Any], repairs: List[str]) -> str:
+    slides, block = split_carousel(content)
+    hashtags = block.split()
+    kept: List[str] = []
+    for slide in slides:
+        slide, tags = _peel_hashtags(slide)
+        if tags:
+            repairs.append("moved hashtags to the hashtag block")
+            hashtags.extend(tags)
+        if slide:
+            kept.append(slide)
+    slides = _fit_count(kept, rules, None, repairs, "slide")
+
+    text = "\n\n".join(f"{i}. {slide}" for i, slide in enumerate(slides, 1))
+    if hashtags:
+        text += "\n\n" + " ".join(dict.fromkeys(hashtags))
+    return text
+
+
+def _repair_single(content: str, repairs: List[str]) -> str:
+    lines = content.strip().splitlines()
+    body: List[str] = []
+    hashtags: List[str] = []
+    for i, line in enumerate(lines):
+        if _HASHTAG_LINE.match(line):
+            if i < len(lines) - 1:
+                repairs.append("moved hashtags to the end")
+            hashtags.extend(_HASHTAG.findall(line))
+        else:
+            body.append(line)
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(body)).strip()
+    if hashtags:
+        text += "\n\n" + " ".join(dict.fromkeys(hashtags))
+    return text
+
+
+def repair_post(platform: Platform, content: str) -> FormatReport:
+    """
+    Validate a post and repair it locally when it breaks a rule.
+    Posts that already satisfy every rule are returned unchanged.
+    Returns:
+        FormatReport: The (repaired) post, the repairs made and any remaining issues
+    """
+    content = content.strip()
+    if not validate_post(platform, content):
+        return FormatReport(content=content)
+
+    repairs: List[str] = []
+    rules = PLATFORM_RULES[platform.value]
+    text = strip_markdown(content)
+    if text != content:
+        repairs.append("stripped markdown")
+    if platform == Platform.TWITTER:
+        text = _repair_thread(text, rules, repairs)
+    elif platform == Platform.INSTAGRAM:
+        text = _repair_carousel(text, rules, repairs)
+    else:
+        text = _repair_single(text, repairs)
+    return FormatReport(content=text, repairs=list(dict.fromkeys(repairs)), issues=validate_post(platform, text))
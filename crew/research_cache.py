@@ -0,0 +1,54 @@
+"""
+Persistent cache of research task output, keyed by normalized topic and the
+preferred source domains used for the search. Regenerating a topic for another
+platform or expertise level reuses the findings instead of rerunning the researcher.
+
+Configured through environment variables:
+    RESEARCH_CACHE              "off" disables the cache
+    RESEARCH_CACHE_PATH         SQLite file (default .cache/research.sqlite3)
+    RESEARCH_CACHE_TTL_HOURS    Entry lifetime in hours (default 24)
+    RESEARCH_CACHE_MAX_ENTRIES  LRU size bound (default 500)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Optional
+from constants.domains import PREFERRED_DOMAINS
+from utils.disk_cache import DiskCache
+
+_cache: Optional[DiskCache] = None
+_cache_lock = threading.Lock()
+
+
+def normalize_topic(topic: str) -> str:
+    """Lowercase, collapse whitespace and drop surrounding punctuation."""
+    topic = " ".join(topic.lower().split())
+    return re.sub(r"^[^\w]+|[^\w]+$", "", topic)
+
+
+def research_cache_key(topic: str, domain_category: str) -> str:
+    """Cache key for a topic researched against a `PREFERRED_DOMAINS` category."""
+    payload = {
+        "topic": normalize_topic(topic),
+        "category": domain_category,
+        "domains": sorted(PREFERRED_DOMAINS.get(domain_category, [])),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_research_cache() -> Optional[DiskCache]:
+    """Returns the process-wide research cache, or None when disabled."""
+    global _cache
+    if os.getenv("RESEARCH_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(
+                path=os.getenv("RESEARCH_CACHE_PATH", os.path.join(".cache", "research.sqlite3")),
+                ttl_s=float(os.getenv("RESEARCH_CACHE_TTL_HOURS", "24")) * 3600,
+                max_entries=int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "500"))
+            )
+        return _cache
@@ -0,0 +1,138 @@
+"""
+Minimal stage scheduler for running pipeline steps as a dependency graph.
+A stage starts as soon as every stage it depends on has finished, so independent
+branches (e.g. writing for several platforms and image design) overlap in time.
+"""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.tracing import span
+
+
+class StageError(RuntimeError):
+    """Raised when a stage fails; remaining stages are not started."""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """A named unit of work and the names of the stages it waits for."""
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class ScheduleResult:
+    """Stage outputs plus per-stage timings in seconds since the run started."""
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+
+class StageScheduler:
+    """
+    Runs stages on a thread pool in dependency order.
+    Each stage function receives a dict with the outputs of the stages it depends on.
+    `on_event(stage, status)` is called with "started", "done" or "failed" as stages progress,
+    and `on_output(stage, output)` with the output of every stage that finished.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 on_event: Optional[Callable[[str, str], None]] = None,
+                 on_output: Optional[Callable[[str, Any], None]] = None):
+        self.max_workers = max_workers
+        self.on_event = on_event
+        self.on_output = on_output
+        self._stages: Dict[str, Stage] = {}
+
+    def _emit(self, stage: str, status: str) -> None:
+        if self.on_event is not None:
+            self.on_event(stage, status)
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], depends_on: Iterable[str] = ()) -> "StageScheduler":
+        """Register a stage. Dependencies may be registered later but must exist before `run`."""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self._stages[name] = Stage(name=name, fn=fn, depends_on=tuple(depends_on))
+        return self
+
+    def _validate(self) -> None:
+        for stage in self._stages.values():
+            missing = [dep for dep in stage.depends_on if dep not in self._stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+        # Kahn's algorithm; anything left over is part of a cycle.
+        remaining = {name: set(stage.depends_on) for name, stage in self._stages.items()}
+        while True:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                break
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        if remaining:
+            raise ValueError(f"Stage dependency cycle between: {sorted(remaining)}")
+
+    def run(self) -> ScheduleResult:
+        """Run all stages and return their outputs. Raises `StageError` on the first failure."""
+        self._validate()
+        result = ScheduleResult()
+        pending: Dict[str, Stage] = dict(self._stages)
+        running: Dict[Future, str] = {}
+        started = time.perf_counter()
+        failure: Optional[StageError] = None
+
+        def run_stage(stage: Stage) -> Any:
+            begin = time.perf_counter() - started
+            self._emit(stage.name, "started")
+            deps = {dep: result.outputs[dep] for dep in stage.depends_on}
+            with span("stage", stage=stage.name):
+                output = stage.fn(deps)
+            result.timings[stage.name] = (round(begin, 3), round(time.perf_counter() - started, 3))
+            return output
+
+        workers = self.max_workers or max(len(self._stages), 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                if failure is None:
+                    ready = [s for s in pending.values() if all(d in result.outputs for d in s.depends_on)]
+                    for stage in ready:
+                        del pending[stage.name]
+                        # Each stage runs in a copy of the caller's context so tracing spans nest.
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, run_stage, stage)] = stage.name
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result.outputs[name] = future.result()
+                    except Exception as e:
+                        self._emit(name, "failed")
+                        if failure is None:
+                            failure = StageError(name, e)
+                    else:
+                        if self.on_output is not None:
+                            self.on_output(name, result.outputs[name])
+                        self._emit(name, "done")
+
+        result.elapsed_s = round(time.perf_counter() - started, 3)
+        if failure is not None:
+            raise failure from failure.error
+        return result
+
+    @property
+    def stage_names(self) -> List[str]:
+        return list(self._stages)
@@ -0,0 +1,93 @@
+"""
+Token streaming from LLM calls to whoever is waiting for the text.
+A stage wraps its crew kickoff in `stream_tokens(callback)`; every LLM call made
+from that thread then streams its completion and hands each text delta to the
+callback. `FinalAnswerFilter` strips CrewAI's "Thought: ... Final Answer:"
+scaffolding so only the answer itself reaches the UI.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+TokenCallback = Callable[[str], None]
+
+_token_sink: ContextVar[Optional[TokenCallback]] = ContextVar("token_sink", default=None)
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+def current_token_sink() -> Optional[TokenCallback]:
+    """The callback LLM calls in this context should stream to, if any."""
+    return _token_sink.get()
+
+
+@contextmanager
+def stream_tokens(callback: Optional[TokenCallback]) -> Iterator[None]:
+    """Stream completions of LLM calls made inside the block to `callback`."""
+    token = _token_sink.set(callback)
+    try:
+        yield
+    finally:
+        _token_sink.reset(token)
+
+
+class FinalAnswerFilter:
+    """
+    Forwards only the text after "Final Answer:" of each LLM completion.
+    Call `new_completion()` between completions; a completion without the
+    marker (e.g. a tool-use step) forwards nothing.
+    """
+
+    def __init__(self, callback: TokenCallback):
+        self.callback = callback
+        self._buffer = ""
+        self._passing = False
+
+    def new_completion(self) -> None:
+        self._buffer = ""
+        self._passing = False
+
+    def __call__(self, delta: str) -> None:
+        if self._passing:
+            self.callback(delta)
+            return
+        self._buffer += delta
+        index = self._buffer.find(FINAL_ANSWER_MARKER)
+        if index >= 0:
+            self._passing = True
+            rest = self._buffer[index + len(FINAL_ANSWER_MARKER):].lstrip()
+            self._buffer = ""
+            if rest:
+                self.callback(rest)
+
+
+class ThrottledText:
+    """
+    Accumulates streamed deltas and publishes the full text at most every
+    `interval_s` seconds, e.g. to keep database writes per token bounded.
+    """
+
+    def __init__(self, publish: Callable[[str], None], interval_s: float = 0.5):
+        self.publish = publish
+        self.interval_s = interval_s
+        self.text = ""
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, delta: str) -> None:
+        with self._lock:
+            self.text += delta
+            now = time.monotonic()
+            if now - self._last < self.interval_s:
+                return
+            self._last = now
+            text = self.text
+        self.publish(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            text = self.text
+        self.publish(text)
@@ -2,10 +2,11 @@
 Task definition for generating background images for social media content.
 """
 
-from crewai import Task
+from typing import Optional
+from crewai import Task, Agent
 from crew.agents.image_designer import get_image_designer_agent
 
-def get_image_design_task() -> Task:
+def get_image_design_task(agent: Optional[Agent] = None) -> Task:
     """Returns a configured image design task."""
     return Task(
         description=(
@@ -27,7 +28,5 @@ def get_image_design_task() -> Task:
             "\n- Avoid any text or symbols in the images"
         ),
         expected_output="Path to the generated background image.",
-        agent=get_image_designer_agent()
+        agent=agent or get_image_designer_agent()
     )
-
-image_design_task = get_image_design_task()
@@ -1,9 +1,10 @@
 """
 Task definition for research.
 """
+from typing import Optional
 from crewai import Task, Agent
 from crew.agents.researcher import get_researcher_agent
-def get_research_task() -> Task:
+def get_research_task(agent: Optional[Agent] = None) -> Task:
     """Creates a research task for gathering information about the topic."""
     return Task(
         description=(
@@ -11,7 +12,5 @@ def get_research_task() -> Task:
             "relevant statistics, and critical insights to form a strong foundation for the report."
             ),
             expected_output="A comprehensive list of data points and insights about {topic}.",
-            agent=get_researcher_agent()
+            agent=agent or get_researcher_agent()
         )
-
-research_task = get_research_task()
@@ -6,8 +6,17 @@ from constants.content_requirements import (
     EXPERTISE_REQUIREMENTS
 )
 
-def create_writing_task(platform: Platform, expertise_level: ExpertiseLevel, writer_agent: Agent) -> Task:
-    """Creates a writing task with specific requirements based on platform and expertise level"""
+def create_writing_task(
+    platform: Platform,
+    expertise_level: ExpertiseLevel,
+    writer_agent: Agent,
+    include_research: bool = False
+) -> Task:
+    """
+    Creates a writing task with specific requirements based on platform and expertise level.
+    With `include_research` the task expects the findings as a `{research}` input instead
+    of receiving them as context from a research task in the same crew.
+    """
     platform_format = PLATFORM_FORMATS.get(platform.value, {}).get("description", "")
     expertise_reqs = EXPERTISE_REQUIREMENTS.get(expertise_level.value, {})
     
@@ -23,10 +32,34 @@ def create_writing_task(platform: Platform, expertise_level: ExpertiseLevel, wri
         f"{expertise_reqs.get('description', '')}\n\n"
         "Ensure the content is engaging, accurate, and matches the platform's style."
     )
+    if include_research:
+        task_description += "\n\nResearch findings:\n{research}"
     
     return Task(
         description=task_description,
         expected_output=f"Platform-native content formatted for {platform}",
         agent=writer_agent,
         async_execution=False
-    )
\ No newline at end of file
+    )
+
+def create_revision_task(platform: Platform, writer_agent: Agent) -> Task:
+    """
+    Creates a task that fixes the format of an existing draft.
+    Expects `{draft}` and `{issues}` inputs; used only when local repair
+    (see `crew.post_format`) could not bring the draft within the platform rules.
+    """
+    platform_format = PLATFORM_FORMATS.get(platform.value, {}).get("description", "")
+
+    return Task(
+        description=(
+            "Revise this {social_platform} post about {topic} so it follows the format rules. "
+            "Keep the content and tone; change only what is needed.\n\n"
+            "Problems found:\n{issues}\n\n"
+            f"{platform_format}\n\n"
+            "- DO NOT use any markdown formatting\n\n"
+            "Draft:\n{draft}"
+        ),
+        expected_output=f"The corrected post, formatted for {platform}",
+        agent=writer_agent,
+        async_execution=False
+    )
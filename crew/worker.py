@@ -0,0 +1,146 @@
+"""
+Worker pool that runs queued generation jobs outside the Streamlit process.
+Each worker process claims jobs from the SQLite job queue, runs the pipeline
+and reports per-stage progress and partial output back to the queue for the UI to poll.
+While a job runs, its worker sends a heartbeat every `HEARTBEAT_INTERVAL_S`. The
+supervisor requeues the jobs of a worker that exited right away and restarts it
+under a new id; jobs whose heartbeat stopped, e.g. on a lost host, are requeued
+after `STALE_JOB_TIMEOUT_S`. With `TRACING=on`, worker N serves its metrics on
+`--metrics-port` + N.
+
+Usage:
+    python -m crew.worker --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+from constants.content_requirements import Platform, ExpertiseLevel
+from crew.job_queue import JobQueue, get_job_queue
+from crew.streaming import ThrottledText
+from utils.tracing import get_tracer, span, tracing_enabled
+
+# Running jobs are marked alive this often, independent of stage progress.
+HEARTBEAT_INTERVAL_S = 30
+# A running job without a heartbeat for this long is assumed lost and requeued.
+STALE_JOB_TIMEOUT_S = 5 * 60
+# Streamed text is written to the queue at most this often.
+PARTIAL_INTERVAL_S = 0.5
+
+
+def _heartbeat(queue: JobQueue, job_id: str, worker_id: str, stop: threading.Event) -> None:
+    """Keep `job_id` alive until `stop` is set or another worker took the job over."""
+    while not stop.wait(HEARTBEAT_INTERVAL_S):
+        if not queue.heartbeat(job_id, worker_id):
+            return
+
+
+def worker_loop(worker_id: str, poll_interval_s: float = 1.0, max_jobs: Optional[int] = None,
+                metrics_port: Optional[int] = None) -> None:
+    """Claim and run jobs until `max_jobs` have been processed (forever when None)."""
+    from crew.agent_pool import get_agent_pool
+    from crew.pipeline import run_pipeline
+
+    if metrics_port and tracing_enabled():
+        # The tracer starts the metrics server on first use; every worker gets its own port.
+        os.environ["METRICS_PORT"] = str(metrics_port)
+        get_tracer()
+    queue = get_job_queue()
+    get_agent_pool().warm()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval_s)
+            continue
+        content = ThrottledText(
+            lambda text, job_id=job.id: queue.set_partial(job_id, worker_id, "content", text), PARTIAL_INTERVAL_S
+        )
+
+        def on_output(stage: str, output, job_id: str = job.id) -> None:
+            if stage.startswith("image:"):
+                queue.set_partial(job_id, worker_id, "image_path", output)
+
+        stop = threading.Event()
+        threading.Thread(
+            target=_heartbeat, args=(queue, job.id, worker_id, stop), name="heartbeat", daemon=True
+        ).start()
+        try:
+            with span("job", job_id=job.id, worker=worker_id, platform=job.platform):
+                try:
+                    result = run_pipeline(
+                        job.topic,
+                        Platform(job.platform),
+                        ExpertiseLevel(job.expertise_level),
+                        on_event=lambda stage, status, job_id=job.id: queue.set_stage(
+                            job_id, worker_id, stage, status
+                        ),
+                        on_token=content,
+                        on_output=on_output,
+                        research=job.research
+                    )
+                finally:
+                    # Publish the deltas that arrived within the last throttle interval.
+                    content.flush()
+        except Exception as e:
+            owned = queue.fail(job.id, worker_id, f"{type(e).__name__}: {e}")
+        else:
+            owned = queue.complete(job.id, worker_id, result)
+        finally:
+            stop.set()
+        if not owned:
+            print(f"Job {job.id} was taken over by another worker; dropped the result of {worker_id}")
+        processed += 1
+
+
+def _start_worker(index: int, poll_interval_s: float,
+                  metrics_port: Optional[int] = None) -> Tuple[multiprocessing.Process, str]:
+    """Start worker `index` under a new id, so a restarted worker never writes as its predecessor."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}:{uuid.uuid4().hex[:8]}"
+    # "spawn" gives each worker a fresh interpreter: the supervisor has the job queue's
+    # SQLite connection open, and SQLite connections must not be used across a fork.
+    process = multiprocessing.get_context("spawn").Process(
+        target=worker_loop, args=(worker_id, poll_interval_s, None, metrics_port + index if metrics_port else None),
+        name=f"worker-{index}", daemon=True
+    )
+    process.start()
+    return process, worker_id
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run generation workers for the job queue.")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Number of worker processes")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between polls of an empty queue")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")) or None,
+                        help="First metrics port when TRACING=on; worker N listens on this port + N")
+    args = parser.parse_args(argv)
+
+    queue = get_job_queue()
+    workers = [_start_worker(i, args.poll_interval, args.metrics_port) for i in range(args.workers)]
+    print(f"Started {args.workers} workers on {queue.path}")
+    try:
+        while True:
+            time.sleep(5)
+            # Replace crashed workers and put their abandoned jobs back in the queue.
+            for i, (process, worker_id) in enumerate(workers):
+                if not process.is_alive():
+                    requeued = queue.requeue_worker(worker_id)
+                    print(f"Worker {process.name} exited with {process.exitcode}, requeued {requeued} jobs, restarting")
+                    workers[i] = _start_worker(i, args.poll_interval, args.metrics_port)
+            requeued = queue.requeue_stale(STALE_JOB_TIMEOUT_S)
+            if requeued:
+                print(f"Requeued {requeued} stale jobs")
+    except KeyboardInterrupt:
+        for process, _ in workers:
+            process.terminate()
+        for process, _ in workers:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
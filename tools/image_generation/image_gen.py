@@ -1,54 +1,180 @@
+import base64
+import logging
 import os
-from datetime import datetime
+import shutil
+import tempfile
+import threading
+import time
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Optional
 from pydantic import Field, PrivateAttr
 from openai import OpenAI
 from crewai.tools import BaseTool
+from tools.image_generation.image_store import ImageStore, get_image_store, image_key
+from utils.rate_limit import get_rate_limiter
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Base64 is decoded in multiples of 4 characters so chunks never split a quantum.
+_B64_CHUNK_CHARS = 4 * 64 * 1024
+_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+def _build_session(pool_size: int, retries: int) -> requests.Session:
+    """Keep-alive session with a connection pool and retry/backoff for image downloads."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class ImageGenerationTool(BaseTool):
     name: str = Field(default="Image Generator")
     description: str = Field(default="Generates and saves professional background images for social media content")
     output_dir: str = Field(default="img")
-    
-    _client: OpenAI = PrivateAttr()
+    model: str = Field(default="dall-e-3")
+    size: str = Field(default="1024x1024")
+    quality: str = Field(default="standard")
+    response_format: str = Field(default="b64_json", description="'b64_json' to decode straight to disk or 'url' to download")
+    timeout_s: float = Field(default=120.0, description="Timeout for the generation request")
+    download_timeout_s: float = Field(default=30.0, description="Read timeout for image downloads")
+    max_retries: int = Field(default=3)
 
-    def __init__(self, output_dir: str = "img", **data):
+    _client: Optional[OpenAI] = PrivateAttr(default=None)
+    _session: Optional[requests.Session] = PrivateAttr(default=None)
+    _store: Optional[ImageStore] = PrivateAttr(default=None)
+    _pool_size: int = PrivateAttr()
+    _local: threading.local = PrivateAttr()
+    _init_lock: threading.Lock = PrivateAttr()
+
+    def __init__(self, output_dir: str = "img", pool_size: int = 8, **data):
         super().__init__(**data)
-        self._client = OpenAI()
         self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
+        self._pool_size = pool_size
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+
+    # The API client, HTTP session and image store are built on first use so that
+    # constructing the tool (and the agent that owns it) does no network or disk work.
+    @property
+    def client(self) -> OpenAI:
+        with self._init_lock:
+            if self._client is None:
+                # Retries are left to the shared rate limiter so it sees every 429.
+                self._client = OpenAI(timeout=self.timeout_s, max_retries=0)
+            return self._client
+
+    @property
+    def session(self) -> requests.Session:
+        with self._init_lock:
+            if self._session is None:
+                self._session = _build_session(self._pool_size, self.max_retries)
+            return self._session
+
+    @property
+    def store(self) -> ImageStore:
+        with self._init_lock:
+            if self._store is None:
+                self._store = get_image_store(self.output_dir)
+            return self._store
+
+    @property
+    def last_timings(self) -> Dict[str, float]:
+        """Per-phase timings in seconds of the last call made from this thread."""
+        return getattr(self._local, "timings", {})
+
+    def _write_b64(self, b64_data: str, filepath: str) -> None:
+        with open(filepath, "wb") as f:
+            for start in range(0, len(b64_data), _B64_CHUNK_CHARS):
+                f.write(base64.b64decode(b64_data[start:start + _B64_CHUNK_CHARS]))
+
+    def _download(self, image_url: str, filepath: str) -> float:
+        """Stream the image to disk and return the seconds spent writing."""
+        write_s = 0.0
+        with self.session.get(image_url, stream=True, timeout=(10, self.download_timeout_s)) as response:
+            response.raise_for_status()
+            with open(filepath, "wb") as f:
+                for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+                    started = time.perf_counter()
+                    f.write(chunk)
+                    write_s += time.perf_counter() - started
+        return write_s
+
+    def _generate(self, prompt: str, key: str, timings: Dict[str, float]) -> str:
+        """Generate an image and move it into the store under `key`."""
+        started = time.perf_counter()
+        response = get_rate_limiter("openai_images").call(lambda: self.client.images.generate(
+            model=self.model,
+            prompt=prompt,
+            size=self.size,
+            quality=self.quality,
+            n=1,
+            response_format=self.response_format,
+        ))
+        timings["generate_s"] = round(time.perf_counter() - started, 3)
+
+        # Write to a temp file in the store so readers never see a partial image.
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".part")
+        os.close(fd)
+        try:
+            started = time.perf_counter()
+            if self.response_format == "b64_json":
+                self._write_b64(response.data[0].b64_json, tmp_path)
+                timings["write_s"] = round(time.perf_counter() - started, 3)
+            else:
+                write_s = self._download(response.data[0].url, tmp_path)
+                timings["download_s"] = round(time.perf_counter() - started - write_s, 3)
+                timings["write_s"] = round(write_s, 3)
+            metadata = {"model": self.model, "size": self.size, "quality": self.quality, "prompt": prompt}
+            return self.store.put(key, tmp_path, metadata)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
 
     def _run(self, prompt: str, filename: Optional[str] = None) -> str:
         """
-        Generate and save an image based on the prompt
+        Generate and save an image based on the prompt.
+        Identical requests are served from the content-addressed image store.
         Args:
             prompt (str): Description of the image to generate
-            filename (str, optional): Custom filename for the image
+            filename (str, optional): Also copy the image to this name in the output directory
         Returns:
             str: Path to the saved image
         """
-        try:
-            response = self._client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size="1024x1024",
-                quality="standard",
-                n=1,
-            )
-            
-            image_url = response.data[0].url
-            
-            if filename is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"carousel_{timestamp}.png"
-            
-            response = requests.get(image_url)
-            if response.status_code == 200:
-                filepath = os.path.join(self.output_dir, filename)
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
+        timings: Dict[str, float] = {}
+        self._local.timings = timings
+        key = image_key(self.model, self.size, self.quality, prompt)
+        with span("tool.image_generation", model=self.model, size=self.size) as current:
+            try:
+                with self.store.lock_for(key):
+                    filepath = self.store.get(key)
+                    timings["cache_hit"] = float(filepath is not None)
+                    current.set(cache_hit=filepath is not None)
+                    if filepath is None:
+                        filepath = self._generate(prompt, key, timings)
+
+                if filename is not None:
+                    target = os.path.join(self.output_dir, filename)
+                    shutil.copyfile(filepath, target)
+                    filepath = target
+
+                logger.info("Generated %s %s", filepath, timings)
                 return filepath
-            return "Failed to download image"
-        except Exception as e:
-            return f"Error generating image: {str(e)}"
\ No newline at end of file
+            # The agent gets the failure as text; the span still records it as an error.
+            except requests.RequestException as e:
+                current.fail(e)
+                return f"Failed to download image: {str(e)}"
+            except Exception as e:
+                current.fail(e)
+                return f"Error generating image: {str(e)}"
@@ -0,0 +1,196 @@
+"""
+Content-addressed store for generated images.
+Images are keyed by a hash of (model, size, quality, normalized prompt), so a
+repeated prompt is served from disk instead of paying for a new generation.
+An SQLite index tracks metadata and last access time; least recently used
+images are evicted once the store exceeds its disk budget. Images derived from
+a stored image (crops, carousel slides) are registered with their source, count
+against the same budget and are evicted together with it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+_stores: Dict[str, "ImageStore"] = {}
+_store_lock = threading.Lock()
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+
+def image_key(model: str, size: str, quality: str, prompt: str) -> str:
+    """Content address of an image generation request."""
+    payload = {"model": model, "size": size, "quality": quality, "prompt": normalize_prompt(prompt)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ImageStore:
+    """
+    Directory of images named by content address plus an SQLite index.
+    Args:
+        root: Directory holding `<key[:2]>/<key>.<ext>` files and `index.sqlite3`
+        max_bytes: Disk budget; least recently used images are evicted beyond it
+    """
+
+    def __init__(self, root: str = "img", max_bytes: Optional[int] = None):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Per-key lock plus the number of threads holding or waiting on it; dropped at zero.
+        self._key_locks: Dict[str, List] = {}
+        self._conn = sqlite3.connect(
+            os.path.join(root, "index.sqlite3"), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " key TEXT PRIMARY KEY,"
+            " path TEXT NOT NULL,"
+            " bytes INTEGER NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(images)")}
+        if "source" not in columns:
+            self._conn.execute("ALTER TABLE images ADD COLUMN source TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_accessed ON images (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_source ON images (source)")
+
+    def path_for(self, key: str, extension: str = ".png") -> str:
+        return os.path.join(self.root, key[:2], f"{key}{extension}")
+
+    @contextmanager
+    def lock_for(self, key: str) -> Iterator[None]:
+        """Hold the lock for `key` while generating it, so concurrent identical prompts generate once."""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored image path and mark it as recently used, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                self._conn.execute("DELETE FROM images WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE images SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def put(self, key: str, source_path: str, metadata: Dict[str, Any], source: Optional[str] = None,
+            extension: str = ".png") -> str:
+        """
+        Move a finished image file into the store and return its final path.
+        Args:
+            key: Content address of the image
+            source_path: Finished file, moved into the store
+            metadata: Stored with the image, e.g. the generation parameters
+            source: Key of the stored image this one was derived from; it is evicted with it
+            extension: File extension of the stored image
+        """
+        path = self.path_for(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (key, path, bytes, metadata, created_at, accessed_at, hits, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (key, path, os.path.getsize(path), json.dumps(metadata), now, now, source)
+            )
+            self._evict(keep=key)
+        return path
+
+    def key_of(self, path: str) -> Optional[str]:
+        """Key of the image stored at `path`, or None when `path` is not in the store."""
+        name = os.path.splitext(os.path.basename(path))[0]
+        if not _KEY_PATTERN.fullmatch(name):
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT key FROM images WHERE key = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT metadata FROM images WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _evict(self, keep: str) -> None:
+        if self.max_bytes is None:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM images").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # The source of a just stored derivative stays too, since evicting it would take the derivative along.
+        source = self._conn.execute("SELECT source FROM images WHERE key = ?", (keep,)).fetchone()
+        kept = {keep, source[0] if source else None}
+        rows = self._conn.execute("SELECT key FROM images ORDER BY accessed_at").fetchall()
+        for (key,) in rows:
+            if total <= self.max_bytes:
+                break
+            if key not in kept:
+                total -= self._remove(key)
+
+    def _remove(self, key: str) -> int:
+        """Delete `key` and the images derived from it; returns the bytes freed."""
+        rows = self._conn.execute(
+            "SELECT key, path, bytes FROM images WHERE key = ? OR source = ?", (key, key)
+        ).fetchall()
+        for removed, path, _ in rows:
+            self._conn.execute("DELETE FROM images WHERE key = ?", (removed,))
+            if os.path.exists(path):
+                os.unlink(path)
+        return sum(size for _, _, size in rows)
+
+    def usage(self) -> Dict[str, int]:
+        """Number of stored images and their total size in bytes."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM images"
+            ).fetchone()
+        return {"images": count, "bytes": size}
+
+
+def store_of(path: str) -> Optional[Tuple[ImageStore, str]]:
+    """The store holding the image at `path` and its key, or None for a file outside any store."""
+    root = os.path.dirname(os.path.dirname(path))
+    if not os.path.exists(os.path.join(root or ".", "index.sqlite3")):
+        return None
+    store = get_image_store(root or ".")
+    key = store.key_of(path)
+    return (store, key) if key else None
+
+
+def get_image_store(root: str = "img") -> ImageStore:
+    """
+    Returns the process-wide image store for `root`.
+    The disk budget is read from `IMAGE_STORE_MAX_MB` (default 2048).
+    """
+    with _store_lock:
+        if root not in _stores:
+            max_mb = float(os.getenv("IMAGE_STORE_MAX_MB", "2048"))
+            _stores[root] = ImageStore(root, max_bytes=int(max_mb * 1024 * 1024))
+        return _stores[root]
@@ -0,0 +1,131 @@
+"""
+Search backends used by the search tool.
+`SerperBackend` calls the Serper.dev API; `FixtureBackend` serves local JSON
+fixtures with configurable latency so searches can be benchmarked offline.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Protocol
+
+
+@dataclass(frozen=True)
+class SearchScope:
+    """How a query is restricted: allowed sites, excluded sites and result count."""
+    name: str
+    sites: tuple = ()
+    exclude: tuple = ()
+    num: int = 5
+
+    def apply(self, query: str) -> str:
+        """Return the query with site operators appended."""
+        parts = [query]
+        if self.sites:
+            parts.append("(" + " OR ".join(f"site:{site}" for site in self.sites) + ")")
+        parts.extend(f"-site:{site}" for site in self.exclude)
+        return " ".join(parts)
+
+
+class SearchBackend(Protocol):
+    """Anything that turns a scoped query into a list of organic results."""
+
+    def search(self, query: str, scope: SearchScope) -> List[Dict[str, Any]]:
+        ...
+
+
+class SerperBackend:
+    """Serper.dev Google search over a pooled keep-alive HTTP session."""
+
+    url = "https://google.serper.dev/search"
+
+    def __init__(self, api_key: Optional[str] = None, timeout_s: float = 15.0):
+        self.api_key = api_key or os.getenv("SERPER_API_KEY", "")
+        self.timeout_s = timeout_s
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+
+                self._session = requests.Session()
+                self._session.headers.update({"X-API-KEY": self.api_key, "Content-Type": "application/json"})
+            return self._session
+
+    def _post(self, payload: str):
+        response = self._get_session().post(self.url, data=payload, timeout=self.timeout_s)
+        response.raise_for_status()
+        return response
+
+    def search(self, query: str, scope: SearchScope) -> List[Dict[str, Any]]:
+        from utils.rate_limit import get_rate_limiter
+
+        payload = json.dumps({"q": scope.apply(query), "num": scope.num})
+        response = get_rate_limiter("serper").call(lambda: self._post(payload))
+        return [
+            {"title": item.get("title", ""), "link": item.get("link", ""), "snippet": item.get("snippet", "")}
+            for item in response.json().get("organic", [])[:scope.num]
+        ]
+
+
+@dataclass
+class FixtureBackend:
+    """
+    Offline stand-in for a search API.
+    Looks up `<fixtures_dir>/<sha1 of scope:query>.json` (a list of results) and falls
+    back to deterministic synthetic results, after sleeping `latency_s` (+/- `jitter_s`).
+    """
+    fixtures_dir: Optional[str] = None
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    calls: int = field(default=0, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @staticmethod
+    def fixture_name(query: str, scope: SearchScope) -> str:
+        return hashlib.sha1(f"{scope.name}:{query}".encode("utf-8")).hexdigest() + ".json"
+
+    def search(self, query: str, scope: SearchScope) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.calls += 1
+        delay = self.latency_s + random.uniform(-self.jitter_s, self.jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.fixtures_dir:
+            path = os.path.join(self.fixtures_dir, self.fixture_name(query, scope))
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)[:scope.num]
+
+        sites = scope.sites or ("example.com",)
+        return [
+            {
+                "title": f"{query.title()} - result {i + 1}",
+                "link": f"https://{sites[i % len(sites)]}/{query.replace(' ', '-')}/{i + 1}",
+                "snippet": f"Key facts and figures about {query} from source {i + 1}.",
+            }
+            for i in range(scope.num)
+        ]
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    Build the backend selected by `SEARCH_BACKEND` ("serper" or "fixture").
+    The fixture backend reads `SEARCH_FIXTURES_DIR` and `SEARCH_FIXTURE_LATENCY_MS`.
+    """
+    backend = os.getenv("SEARCH_BACKEND", "serper").lower()
+    if backend == "fixture":
+        return FixtureBackend(
+            fixtures_dir=os.getenv("SEARCH_FIXTURES_DIR"),
+            latency_s=float(os.getenv("SEARCH_FIXTURE_LATENCY_MS", "0")) / 1000
+        )
+    if backend == "serper":
+        return SerperBackend()
+    raise ValueError(f"Unknown SEARCH_BACKEND: {backend}")
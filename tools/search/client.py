@@ -0,0 +1,136 @@
+"""
+Caching, coalescing search client shared by all researcher agents.
+Runs the site-restricted and general searches for a query in parallel, merges
+identical in-flight queries into a single backend request and caches results
+with expiry, so repeated or near-identical queries from the LLM cost nothing.
+"""
+
+import contextvars
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from constants.domains import PREFERRED_DOMAINS
+from tools.search.backends import SearchBackend, SearchScope, get_search_backend
+from utils.tracing import span
+
+_client: Optional["SearchClient"] = None
+_client_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query: NFKC, lowercase, no quotes/trailing punctuation, single spaces."""
+    query = unicodedata.normalize("NFKC", query).lower()
+    query = re.sub(r"[\"'`“”‘’]", "", query)
+    query = re.sub(r"[?!.,;]+(\s|$)", r"\1", query)
+    return " ".join(query.split())
+
+
+@dataclass
+class SearchStats:
+    """Request counters for a search client."""
+    requests: int = 0
+    backend_calls: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+
+
+class SearchClient:
+    """
+    Caching, coalescing front end for a search backend.
+    Args:
+        backend: Backend that performs the actual searches
+        ttl_s: Seconds a cached result stays valid
+        max_entries: Maximum cached (scope, query) results, least recently used evicted first
+        max_workers: Threads used to run scopes of one query in parallel
+    """
+
+    def __init__(self, backend: SearchBackend, ttl_s: float = 3600.0,
+                 max_entries: int = 1024, max_workers: int = 8):
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.stats = SearchStats()
+        self._cache: "OrderedDict[Tuple[SearchScope, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[SearchScope, str], Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+    def search(self, query: str, scope: SearchScope) -> List[Dict[str, Any]]:
+        """Search one scope, served from cache or an identical in-flight request when possible."""
+        with span("search.query", scope=scope.name) as current:
+            return self._search(query, scope, current)
+
+    def _search(self, query: str, scope: SearchScope, current) -> List[Dict[str, Any]]:
+        key = (scope, normalize_query(query))
+        with self._lock:
+            self.stats.requests += 1
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] <= self.ttl_s:
+                self._cache.move_to_end(key)
+                self.stats.cache_hits += 1
+                current.set(cache_hit=True)
+                return cached[1]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats.backend_calls += 1
+            else:
+                self.stats.coalesced += 1
+        current.set(cache_hit=False, coalesced=not owner)
+
+        if not owner:
+            return future.result()
+
+        try:
+            results = self.backend.search(key[1], scope)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            self._cache[key] = (time.monotonic(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        future.set_result(results)
+        return results
+
+    def search_scopes(self, query: str, scopes: Sequence[SearchScope]) -> List[Dict[str, Any]]:
+        """Search all scopes in parallel and merge the results, dropping duplicate links."""
+        futures = [self._executor.submit(contextvars.copy_context().run, self.search, query, scope) for scope in scopes]
+        merged: List[Dict[str, Any]] = []
+        seen = set()
+        for future in futures:
+            for item in future.result():
+                link = item.get("link")
+                if link in seen:
+                    continue
+                seen.add(link)
+                merged.append(item)
+        return merged
+
+
+def get_search_client() -> SearchClient:
+    """Returns the process-wide search client so every agent shares one cache."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SearchClient(get_search_backend())
+        return _client
+
+
+def default_scopes(domain_category: str = "trading") -> List[SearchScope]:
+    """Site-restricted search over preferred domains plus a general web search."""
+    return [
+        SearchScope(name=f"preferred:{domain_category}", sites=tuple(PREFERRED_DOMAINS.get(domain_category, [])), num=5),
+        SearchScope(name="general", exclude=("pinterest.com", "facebook.com", "instagram.com"), num=5),
+    ]
@@ -0,0 +1,41 @@
+"""
+Web search tool for the researcher agent, backed by the shared `SearchClient`.
+"""
+
+from typing import List, Optional, Type
+from pydantic import BaseModel, Field, PrivateAttr
+from crewai.tools import BaseTool
+from tools.search.backends import SearchScope
+from tools.search.client import SearchClient, default_scopes, get_search_client
+from utils.tracing import span
+
+
+class SearchToolInput(BaseModel):
+    search_query: str = Field(..., description="Query to search the internet with")
+
+
+class SearchTool(BaseTool):
+    name: str = Field(default="Search the internet")
+    description: str = Field(
+        default="Searches authoritative sources and the general web for a query and returns titles, links and snippets"
+    )
+    args_schema: Type[BaseModel] = SearchToolInput
+
+    _client: SearchClient = PrivateAttr()
+    _scopes: List[SearchScope] = PrivateAttr()
+
+    def __init__(self, domain_category: str = "trading", client: Optional[SearchClient] = None, **data):
+        super().__init__(**data)
+        self._client = client or get_search_client()
+        self._scopes = default_scopes(domain_category)
+
+    def _run(self, search_query: str) -> str:
+        with span("tool.search", scopes=len(self._scopes)) as current:
+            results = self._client.search_scopes(search_query, self._scopes)
+            current.set(results=len(results))
+        if not results:
+            return f"No results found for '{search_query}'."
+        return "\n---\n".join(
+            f"Title: {item.get('title', '')}\nLink: {item.get('link', '')}\nSnippet: {item.get('snippet', '')}"
+            for item in results
+        )
@@ -0,0 +1,137 @@
+"""
+Pool of reusable headless Chrome sessions for rendering HTML previews to PNG.
+Sessions are started lazily, shared across threads, and replaced automatically
+when a browser crashes. Selenium is only imported when the first session starts.
+"""
+
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+_pool: Optional["BrowserPool"] = None
+_pool_lock = threading.Lock()
+
+_READY_SCRIPT = (
+    "return document.readyState === 'complete' && "
+    "Array.from(document.images).every(img => img.complete);"
+)
+
+
+def _chrome_driver(window_size: Tuple[int, int], page_load_timeout_s: float) -> Any:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument(f"--window-size={window_size[0]},{window_size[1]}")
+    chrome_options.add_argument("--hide-scrollbars")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(page_load_timeout_s)
+    return driver
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of headless browser sessions.
+    Args:
+        size: Maximum number of concurrent browser sessions
+        window_size: Browser viewport in pixels
+        timeout_s: Page load and ready-state wait timeout
+        driver_factory: Callable returning a new WebDriver, for other browsers or tests
+    """
+
+    def __init__(self, size: int = 2, window_size: Tuple[int, int] = (800, 1000), timeout_s: float = 15.0,
+                 driver_factory: Optional[Callable[[], Any]] = None):
+        self.size = size
+        self.timeout_s = timeout_s
+        self._driver_factory = driver_factory or (lambda: _chrome_driver(window_size, timeout_s))
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._drivers = set()
+        self.restarts = 0
+
+    @contextmanager
+    def session(self) -> Iterator[Any]:
+        """Check out a browser session; a session that raises is discarded instead of returned."""
+        self._slots.acquire()
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._driver_factory()
+                with self._lock:
+                    self._drivers.add(driver)
+            try:
+                yield driver
+            except BaseException:
+                self._discard(driver)
+                raise
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def _discard(self, driver: Any) -> None:
+        with self._lock:
+            self._drivers.discard(driver)
+            self.restarts += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def load_html(self, driver: Any, html: str) -> None:
+        """Load `html` into the page without a temp file and wait until it and its images are ready."""
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver.get("about:blank")
+        driver.execute_script("document.open(); document.write(arguments[0]); document.close();", html)
+        WebDriverWait(driver, self.timeout_s, poll_frequency=0.05).until(
+            lambda d: d.execute_script(_READY_SCRIPT)
+        )
+
+    def screenshot(self, html: str, selector: str, output_path: str, retries: int = 1) -> str:
+        """
+        Render `html` and save a PNG of the element matching `selector`.
+        A crashed browser is replaced and the render retried up to `retries` times.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        for attempt in range(retries + 1):
+            try:
+                with self.session() as driver:
+                    self.load_html(driver, html)
+                    driver.find_element("css selector", selector).screenshot(output_path)
+                    return output_path
+            except WebDriverException:
+                if attempt == retries:
+                    raise
+        return output_path
+
+    def close(self) -> None:
+        """Quit every browser session."""
+        with self._lock:
+            drivers, self._drivers = list(self._drivers), set()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def get_browser_pool(size: int = 2) -> BrowserPool:
+    """Returns the process-wide browser pool, closed automatically at exit."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(size=size)
+            atexit.register(_pool.close)
+        return _pool
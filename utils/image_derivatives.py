@@ -0,0 +1,287 @@
+"""
+Local post-processing of generated images.
+One generated background is turned into everything a post needs: a crop at the
+platform's native size (`PLATFORM_IMAGE_SIZES`), cheap per-slide variants
+(offset crops, color shifts, gradients, mirroring) and carousel slides with
+their text rendered on top. A full carousel costs one image generation plus
+local rendering. The work is CPU-bound and runs in a shared process pool;
+outputs are named after their inputs and reused when they already exist.
+Derivatives of an image in the image store are registered in that store under
+its key plus the render parameters, so they share its disk budget and are
+evicted together with the generated image.
+
+Configured through environment variables:
+    IMAGE_DERIVE_WORKERS  Process pool size (default: number of CPUs, at most 4)
+"""
+
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+from constants.content_requirements import Platform, PLATFORM_IMAGE_SIZES
+from tools.image_generation.image_store import ImageStore, store_of
+
+FONT_CANDIDATES = ("DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf")
+JPEG_QUALITY = 90
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class DerivedImages:
+    """Platform-ready images derived from one generated background."""
+    image_path: str
+    backgrounds: List[str] = field(default_factory=list)
+    slides: List[str] = field(default_factory=list)
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _derived_key(source: str, source_key: Optional[str], *parts) -> str:
+    """Hash of the source (its store key, else the file version) and the render parameters."""
+    if source_key is None:
+        stat = os.stat(source)
+        origin = [os.path.abspath(source), stat.st_mtime_ns, stat.st_size]
+    else:
+        origin = [source_key]
+    return hashlib.sha256(json.dumps([*origin, *parts]).encode("utf-8")).hexdigest()
+
+
+def _derived_path(output_dir: str, source: str, *parts) -> str:
+    """Output path named after the source file version and the render parameters."""
+    return os.path.join(output_dir, f"{_derived_key(source, None, *parts)[:24]}.jpg")
+
+
+def _save(img, output_path: str) -> str:
+    # Write to a temporary name first so a concurrent reader never sees half a file.
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    img.convert("RGB").save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _background(source: str, size: Tuple[int, int], index: int):
+    """Crop `source` to `size`; every index > 0 gets a different cheap variant."""
+    from PIL import Image, ImageEnhance, ImageOps
+
+    with Image.open(source) as img:
+        img = img.convert("RGB")
+        # Shift the crop window along the longer axis so variants show different regions.
+        offset = 0.5 if index == 0 else (0.2 + 0.6 * ((index * 0.37) % 1))
+        img = ImageOps.fit(img, size, Image.LANCZOS, centering=(offset, 0.5))
+
+    kind = (index - 1) % 4 if index > 0 else None
+    if kind == 0:
+        hue, saturation, value = img.convert("HSV").split()
+        shift = (index * 37) % 256
+        hue = hue.point(lambda x: (x + shift) % 256)
+        img = Image.merge("HSV", (hue, saturation, value)).convert("RGB")
+    elif kind == 1:
+        img = ImageEnhance.Brightness(ImageOps.mirror(img)).enhance(0.9)
+    elif kind == 2:
+        mask = Image.linear_gradient("L").resize(size)
+        img = Image.composite(ImageEnhance.Brightness(img).enhance(0.55), img, mask)
+    elif kind == 3:
+        img = ImageEnhance.Contrast(ImageOps.flip(img)).enhance(0.85)
+    return img
+
+
+def _font(px: int):
+    from PIL import ImageFont
+
+    for name in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, px)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=px)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed-size bitmap font.
+        return ImageFont.load_default()
+
+
+def _drawable(text: str) -> str:
+    # Bundled fonts have no emoji glyphs; drop them rather than render empty boxes.
+    return "".join(ch for ch in text if ord(ch) <= 0xFFFF and not 0xFE00 <= ord(ch) <= 0xFE0F).strip()
+
+
+def _wrap(draw, text: str, font, max_width: int) -> str:
+    lines: List[str] = []
+    for paragraph in text.splitlines() or [""]:
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}" if current else word
+            if current and draw.textlength(candidate, font=font) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return "\n".join(lines)
+
+
+def render_background(source: str, size: Tuple[int, int], index: int, output_path: str) -> str:
+    """Render variant `index` of `source` at `size`; index 0 is the plain crop."""
+    if os.path.exists(output_path):
+        return output_path
+    return _save(_background(source, size, index), output_path)
+
+
+def render_slide(source: str, text: str, index: int, total: int, size: Tuple[int, int], output_path: str) -> str:
+    """Render carousel slide `index` (0-based): a background variant with the slide text on a dark panel."""
+    if os.path.exists(output_path):
+        return output_path
+    from PIL import Image, ImageDraw
+
+    img = _background(source, size, index).convert("RGBA")
+    width, height = size
+    margin = width // 12
+    overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    text = _drawable(text)
+    px = width // 14
+    while True:
+        font = _font(px)
+        wrapped = _wrap(draw, text, font, width - 4 * margin)
+        left, top, right, bottom = draw.multiline_textbbox((0, 0), wrapped, font=font, spacing=px // 3, align="center")
+        if bottom - top <= height - 4 * margin or px <= width // 32:
+            break
+        px = int(px * 0.85)
+
+    text_w, text_h = right - left, bottom - top
+    x, y = (width - text_w) // 2, (height - text_h) // 2
+    draw.rounded_rectangle(
+        (x - margin, y - margin, x + text_w + margin, y + text_h + margin),
+        radius=margin // 2, fill=(0, 0, 0, 115)
+    )
+    draw.multiline_text((x - left, y - top), wrapped, font=font, fill="white", spacing=px // 3, align="center")
+
+    badge_font = _font(max(width // 40, 12))
+    badge = f"{index + 1}/{total}"
+    bw = draw.textlength(badge, font=badge_font)
+    draw.rounded_rectangle(
+        (width - margin - bw - 24, margin - 8, width - margin, margin + width // 40 + 12),
+        radius=16, fill=(0, 0, 0, 150)
+    )
+    draw.text((width - margin - bw - 12, margin), badge, font=badge_font, fill="white")
+    return _save(Image.alpha_composite(img, overlay), output_path)
+
+
+def get_derive_pool() -> Executor:
+    """
+    Returns the shared pool for image rendering.
+    Processes are used where possible; daemonic worker processes (see `crew.worker`)
+    may not start children, so they fall back to threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv("IMAGE_DERIVE_WORKERS", "0")) or min(os.cpu_count() or 1, 4)
+            if multiprocessing.current_process().daemon:
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="derive")
+            else:
+                # "spawn" avoids forking a process that already runs threads.
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+class _Derivation:
+    """One derived image: already stored, or rendering on the pool and stored once finished."""
+
+    def __init__(self, executor: Executor, store: Optional[ImageStore], source_key: Optional[str],
+                 output_dir: Optional[str], source: str, parts: Tuple, render: Callable[..., str], *args: Any):
+        self.store = store
+        self.source_key = source_key
+        self.parts = parts
+        self.key: Optional[str] = None
+        self.path: Union[str, Future]
+        if store is None:
+            self.path = executor.submit(render, source, *args, _derived_path(output_dir, source, *parts))
+            return
+        self.key = _derived_key(source, source_key, *parts)
+        stored = store.get(self.key)
+        if stored is not None:
+            self.path = stored
+            return
+        tmp_path = os.path.join(store.root, f"{self.key}.{uuid.uuid4().hex}.part")
+        self.path = executor.submit(render, source, *args, tmp_path)
+
+    def result(self) -> str:
+        if isinstance(self.path, str):
+            return self.path
+        path = self.path.result()
+        if self.store is None:
+            return path
+        metadata = {"derived_from": self.source_key, "render": list(self.parts)}
+        try:
+            return self.store.put(self.key, path, metadata, source=self.source_key, extension=".jpg")
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def derive_images(source: str, platform: Platform, slides: Optional[Sequence[str]] = None,
+                  output_dir: Optional[str] = None, executor: Optional[Executor] = None,
+                  store: Optional[ImageStore] = None) -> DerivedImages:
+    """
+    Derive the images for one post from a generated background.
+    Args:
+        source: Generated image file
+        platform: Selects the output size from `PLATFORM_IMAGE_SIZES`
+        slides: Carousel slide texts; one background variant and one rendered slide each
+        output_dir: Write derived images here instead of registering them in an image store
+        executor: Pool to render on, defaults to `get_derive_pool()`
+        store: Image store the derived images are registered in, default the store holding
+            `source`; images outside any store are derived into `derived/` next to `source`
+    Returns:
+        DerivedImages: The platform crop, per-slide backgrounds and rendered slides.
+        Without Pillow the source is returned unchanged.
+    """
+    if not pillow_available() or not os.path.exists(source):
+        return DerivedImages(image_path=source)
+    source_key = None
+    if store is not None:
+        source_key = store.key_of(source)
+    elif output_dir is None:
+        store, source_key = store_of(source) or (None, None)
+    if store is None:
+        output_dir = output_dir or os.path.join(os.path.dirname(source) or ".", "derived")
+        os.makedirs(output_dir, exist_ok=True)
+    executor = executor or get_derive_pool()
+    size = PLATFORM_IMAGE_SIZES[platform.value]
+    slides = list(slides or [])
+
+    def derivation(parts: Tuple, render: Callable[..., str], *args: Any) -> _Derivation:
+        return _Derivation(executor, store, source_key, output_dir, source, parts, render, *args)
+
+    backgrounds = [
+        derivation(("background", size, index), render_background, size, index)
+        for index in range(max(len(slides), 1))
+    ]
+    rendered = [
+        derivation(("slide", size, index, len(slides), text), render_slide, text, index, len(slides), size)
+        for index, text in enumerate(slides)
+    ]
+
+    background_paths = [item.result() for item in backgrounds]
+    return DerivedImages(
+        image_path=background_paths[0],
+        backgrounds=background_paths if slides else [],
+        slides=[item.result() for item in rendered]
+    )
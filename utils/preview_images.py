@@ -0,0 +1,66 @@
+"""
+Image encoding for HTML previews.
+Images are downscaled to the width they are rendered at, re-encoded (WebP by
+default) and memoized as data URIs keyed by path, mtime and size, so preview
+payloads stay small and repeated renders skip the encoding work.
+"""
+
+import base64
+import io
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+PREVIEW_WIDTH = 552
+
+_MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+def _raw_data_uri(path: str) -> str:
+    img_type = path.split('.')[-1].lower()
+    with open(path, 'rb') as img_file:
+        return f"data:image/{img_type};base64,{base64.b64encode(img_file.read()).decode('utf-8')}"
+
+
+@lru_cache(maxsize=256)
+def _encode(path: str, mtime_ns: int, size: int, width: int, fmt: str, quality: int) -> str:
+    # mtime_ns and size only take part in the cache key, so a rewritten file is re-encoded.
+    try:
+        from PIL import Image
+    except ImportError:
+        return _raw_data_uri(path)
+
+    with Image.open(path) as img:
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        save_kwargs = {"optimize": True} if fmt == "png" else {"quality": quality}
+        img.save(buffer, format=fmt.upper(), **save_kwargs)
+    return f"data:{_MIME_TYPES[fmt]};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+
+def image_data_uri(path: str, width: int = PREVIEW_WIDTH, fmt: Optional[str] = None, quality: int = 80) -> str:
+    """
+    Data URI of `path` resized to at most `width` pixels wide.
+    Args:
+        path: Image file to encode
+        width: Rendered width in pixels
+        fmt: "webp", "jpeg" or "png"; defaults to `PREVIEW_IMAGE_FORMAT` or webp
+        quality: Lossy encoder quality
+    Returns:
+        str: `data:` URI ready to use as an `<img src>`
+    """
+    fmt = (fmt or os.getenv("PREVIEW_IMAGE_FORMAT", "webp")).lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in _MIME_TYPES:
+        raise ValueError(f"Unsupported preview image format: {fmt}")
+    stat = os.stat(path)
+    return _encode(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, width, fmt, quality)
+
+
+def image_data_uris(image_paths: Optional[List[str]], width: int = PREVIEW_WIDTH) -> List[str]:
+    """Data URIs for every existing path in `image_paths`."""
+    return [image_data_uri(path, width) for path in image_paths or [] if os.path.exists(path)]
@@ -0,0 +1,203 @@
+"""
+Preview rendering for every supported platform.
+All templates live in `utils/templates` and are compiled once into a shared
+Jinja2 `Environment` with an on-disk bytecode cache, so rendering a preview
+costs only the template execution.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from constants.content_requirements import Platform
+from utils.preview_images import image_data_uris
+from utils.tracing import span
+
+if TYPE_CHECKING:
+    from utils.browser_pool import BrowserPool
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+PREVIEW_SELECTOR = ".preview-card"
+
+PLATFORM_TEMPLATES: Dict[Platform, str] = {
+    Platform.LINKEDIN: "linkedin.html.j2",
+    Platform.TWITTER: "twitter.html.j2",
+    Platform.INSTAGRAM: "instagram.html.j2",
+}
+
+# Width in pixels images are displayed at on each platform's card.
+PLATFORM_IMAGE_WIDTHS: Dict[Platform, int] = {
+    Platform.LINKEDIN: 552,
+    Platform.TWITTER: 480,
+    Platform.INSTAGRAM: 552,
+}
+
+DEFAULT_PROFILE = {"author": "DualSharks", "handle": "dualsharks", "initials": "DS"}
+
+_environment = None
+_environment_lock = threading.Lock()
+
+_NUMBERED_ITEM = re.compile(r"^\s*(?:\(?\d{1,2}\s*(?:/\s*\d{1,2})?[/.):]|(?:tweet|slide)\s*\d{1,2}\s*[:.\-–])\s*", re.IGNORECASE)
+_HASHTAG_LINE = re.compile(r"^\s*(?:#\w+\s*)+$")
+
+
+def get_environment():
+    """Returns the shared Jinja2 environment with every platform template precompiled."""
+    global _environment
+    with _environment_lock:
+        if _environment is None:
+            from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+            cache_dir = os.getenv("PREVIEW_TEMPLATE_CACHE", os.path.join(".cache", "jinja"))
+            os.makedirs(cache_dir, exist_ok=True)
+            environment = Environment(
+                loader=FileSystemLoader(TEMPLATE_DIR),
+                autoescape=select_autoescape(enabled_extensions=("html", "j2"), default_for_string=True),
+                bytecode_cache=FileSystemBytecodeCache(cache_dir),
+                auto_reload=False,
+                trim_blocks=True,
+                lstrip_blocks=True,
+            )
+            for name in [*PLATFORM_TEMPLATES.values(), "embed.html.j2", "page.html.j2"]:
+                environment.get_template(name)
+            _environment = environment
+        return _environment
+
+
+def _split_numbered(content: str) -> List[str]:
+    """Split on numbered items ("1/", "2.", "Tweet 3:", "Slide 4 -"), else on blank lines."""
+    lines = content.strip().splitlines()
+    starts = [i for i, line in enumerate(lines) if _NUMBERED_ITEM.match(line)]
+    if len(starts) >= 2:
+        bounds = starts + [len(lines)]
+        head = "\n".join(lines[:starts[0]]).strip()
+        items = [head] if head else []
+        items.extend("\n".join(lines[a:b]).strip() for a, b in zip(bounds, bounds[1:]))
+        return [item for item in items if item]
+    return [block.strip() for block in re.split(r"\n\s*\n", content.strip()) if block.strip()]
+
+
+def strip_numbering(item: str) -> str:
+    """Remove a leading thread/slide number ("1/", "2.", "Tweet 3:") from an item."""
+    return _NUMBERED_ITEM.sub("", item, count=1)
+
+
+def split_thread(content: str) -> List[str]:
+    """Split writer output for Twitter into individual tweets."""
+    return _split_numbered(content)
+
+
+def split_carousel(content: str) -> Tuple[List[str], str]:
+    """Split writer output for Instagram into slide texts and the trailing hashtag block."""
+    lines = content.strip().splitlines()
+    hashtags: List[str] = []
+    while lines and (not lines[-1].strip() or _HASHTAG_LINE.match(lines[-1])):
+        line = lines.pop().strip()
+        if line:
+            hashtags.insert(0, " ".join(line.split()))
+    items = _split_numbered("\n".join(lines))
+    slides = [strip_numbering(item) for item in items]
+    return slides, " ".join(hashtags)
+
+
+def _context(platform: Platform, content: str, images: List[str], timestamp: Optional[str]) -> Dict[str, Any]:
+    context: Dict[str, Any] = dict(DEFAULT_PROFILE)
+    context.update(
+        card_template=PLATFORM_TEMPLATES[platform],
+        images=images,
+        timestamp=timestamp or datetime.now().strftime("%b %d, %Y"),
+    )
+    if platform == Platform.TWITTER:
+        context["tweets"] = split_thread(content)
+    elif platform == Platform.INSTAGRAM:
+        context["slides"], context["hashtags"] = split_carousel(content)
+        context["caption"] = ""
+    else:
+        context["text"] = content
+    return context
+
+
+def _render(template_name: str, platform: Platform, content: str, image_paths: Optional[List[str]],
+            timestamp: Optional[str], image_urls: Optional[List[str]] = None, **extra: Any) -> str:
+    count = len(image_urls if image_urls is not None else image_paths or [])
+    with span("preview.render", platform=platform.value, template=template_name, images=count):
+        if image_urls is not None:
+            images = image_urls
+        else:
+            images = image_data_uris(image_paths, PLATFORM_IMAGE_WIDTHS[platform])
+        template = get_environment().get_template(template_name)
+        return template.render(_context(platform, content, images, timestamp), **extra)
+
+
+def render_card(platform: Platform, content: str, image_paths: Optional[List[str]] = None,
+                timestamp: Optional[str] = None) -> str:
+    """Render just the platform card for `content`."""
+    return _render(PLATFORM_TEMPLATES[platform], platform, content, image_paths, timestamp)
+
+
+def render_preview(platform: Platform, content: str, image_paths: Optional[List[str]] = None,
+                   timestamp: Optional[str] = None) -> str:
+    """Render a scrollable preview of `content` for embedding in the Streamlit app."""
+    return _render("embed.html.j2", platform, content, image_paths, timestamp)
+
+
+def render_page(platform: Platform, content: str, image_paths: Optional[List[str]] = None,
+                timestamp: Optional[str] = None, background: str = "#f3f2ef",
+                image_urls: Optional[List[str]] = None) -> str:
+    """
+    Render a standalone HTML page with the preview card, used for screenshots and exports.
+    `image_urls` are referenced as they are (e.g. relative paths next to the page)
+    instead of inlining `image_paths` as data URIs.
+    """
+    return _render("page.html.j2", platform, content, image_paths, timestamp, image_urls, background=background)
+
+
+class PreviewGenerator:
+    """Renders HTML and PNG previews of generated content for one platform."""
+
+    def __init__(self, platform: Platform):
+        self.platform = platform
+
+    def generate_preview(self, content: str, image_paths: List[str] = None) -> str:
+        """Generate a platform-style preview of the content."""
+        return render_preview(self.platform, content, image_paths)
+
+    def save_preview_as_png(self, text: str, image_paths: List[str], output_path: str,
+                            pool: Optional["BrowserPool"] = None) -> str:
+        """
+        Save the preview as a PNG file
+        Args:
+            text: The post content
+            image_paths: List of paths to images to include
+            output_path: Where to save the PNG file
+            pool: Browser pool to render with, defaults to the shared pool
+        Returns:
+            str: Path to the saved PNG file
+        """
+        from utils.browser_pool import get_browser_pool
+
+        pool = pool or get_browser_pool()
+        return pool.screenshot(render_page(self.platform, text, image_paths), PREVIEW_SELECTOR, output_path)
+
+    def save_previews_as_png(self, batch: List[Dict[str, Any]], pool: Optional["BrowserPool"] = None) -> List[str]:
+        """
+        Render many previews in parallel over the pooled browser sessions.
+        Args:
+            batch: Dicts with `text`, `output_path` and optional `image_paths`
+            pool: Browser pool to render with, defaults to the shared pool
+        Returns:
+            List[str]: Paths to the saved PNG files, in input order
+        """
+        from utils.browser_pool import get_browser_pool
+
+        pool = pool or get_browser_pool()
+        with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="preview") as executor:
+            return list(executor.map(
+                lambda item: self.save_preview_as_png(
+                    item["text"], item.get("image_paths") or [], item["output_path"], pool=pool
+                ),
+                batch
+            ))
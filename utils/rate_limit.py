@@ -0,0 +1,326 @@
+"""
+Shared rate limiting for provider APIs (LLM completions, image generation, search).
+Each provider gets one `RateLimiter` per process that combines:
+    - token buckets for requests and tokens per minute,
+    - an adaptive concurrency limit that halves on 429 responses and backs off when
+      latency climbs well above its running average (AIMD),
+    - retries of 429s and transient errors with full-jitter exponential backoff
+      that honor `Retry-After`.
+With `RATE_LIMIT_STATE` set, the buckets live in a SQLite file so every process
+on the host (UI, workers, batch runs) draws from the same per-minute quota.
+
+Configured through environment variables, per provider (OPENAI, OPENAI_IMAGES, SERPER):
+    RATE_LIMIT_<PROVIDER>_RPM          Requests per minute
+    RATE_LIMIT_<PROVIDER>_TPM          Tokens per minute (0 = unlimited)
+    RATE_LIMIT_<PROVIDER>_CONCURRENCY  Upper bound for concurrent calls
+and globally:
+    RATE_LIMIT          "off" disables limiting (retries still apply)
+    RATE_LIMIT_STATE    SQLite file shared across processes
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Defaults stay below the lowest paid OpenAI tier and Serper's standard plan.
+PROVIDER_DEFAULTS: Dict[str, Dict[str, int]] = {
+    "openai": {"rpm": 500, "tpm": 200_000, "concurrency": 16},
+    "openai_images": {"rpm": 5, "tpm": 0, "concurrency": 4},
+    "serper": {"rpm": 300, "tpm": 0, "concurrency": 16},
+}
+
+_limiters: Dict[str, "RateLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Recognize 429s from openai, litellm and requests without importing them."""
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Server errors, timeouts and dropped connections that are worth retrying."""
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status in (500, 502, 503, 504):
+        return True
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout", "ConnectionError",
+                                    "InternalServerError", "ServiceUnavailableError")
+
+
+def retry_after_s(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from a `Retry-After` header if present."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base_s: float = 0.5, cap_s: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap_s, base_s * 2 ** attempt))
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Take `amount` now if available, else return the seconds until it will be."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            amount = min(amount, self.capacity)
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until `amount` tokens are taken; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            wait_s = self._reserve(amount)
+            if wait_s <= 0:
+                return waited
+            time.sleep(wait_s)
+            waited += wait_s
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a SQLite file, shared by every process using it.
+    Each reservation is one short `BEGIN IMMEDIATE` transaction.
+    """
+
+    def __init__(self, path: str, name: str, per_minute: float, capacity: Optional[float] = None):
+        super().__init__(per_minute, capacity)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.name = name
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _reserve(self, amount: float) -> float:
+        conn = self._connection()
+        # Wall-clock time, since monotonic clocks are not comparable across processes.
+        now = time.time()
+        amount = min(amount, self.capacity)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens = self.capacity if row is None else min(self.capacity, row[0] + max(now - row[1], 0) * self.rate)
+            wait_s = 0.0
+            if tokens >= amount:
+                tokens -= amount
+            else:
+                wait_s = (amount - tokens) / self.rate
+            conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                         (self.name, tokens, now))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return wait_s
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that adapts to the provider (AIMD).
+    A 429 halves the limit, a call much slower than the running average latency
+    shrinks it by 10%, and every other success grows it by 1/limit, i.e. by about
+    one slot per `limit` successful calls, up to `maximum`.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: Optional[int] = None,
+                 latency_factor: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial or max(minimum, maximum // 2))
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.avg_latency_s: Optional[float] = None
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Block until a slot is free; returns the seconds waited."""
+        started = time.monotonic()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.monotonic() - started
+
+    def release(self, latency_s: Optional[float] = None, throttled: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            elif latency_s is not None:
+                slow = self.avg_latency_s is not None and latency_s > self.latency_factor * self.avg_latency_s
+                self.avg_latency_s = latency_s if self.avg_latency_s is None else 0.9 * self.avg_latency_s + 0.1 * latency_s
+                if slow:
+                    self.limit = max(self.minimum, self.limit * 0.9)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+@dataclass
+class LimiterStats:
+    """Counters for one provider's limiter."""
+    calls: int = 0
+    throttled: int = 0
+    retries: int = 0
+    failures: int = 0
+    waited_s: float = 0.0
+
+
+class RateLimiter:
+    """
+    Process-wide gate for one provider API.
+    Use `call(fn, tokens=...)` to run a request through the buckets, the adaptive
+    concurrency limit and the retry policy, or `slot()` to guard a block yourself.
+    """
+
+    def __init__(self, name: str, rpm: float, tpm: float = 0, concurrency: int = 16,
+                 max_retries: int = 5, enabled: bool = True, state_path: Optional[str] = None):
+        self.name = name
+        self.enabled = enabled
+        self.max_retries = max_retries
+        if state_path:
+            self.requests = SharedTokenBucket(state_path, f"{name}:requests", rpm) if rpm else None
+            self.tokens = SharedTokenBucket(state_path, f"{name}:tokens", tpm) if tpm else None
+        else:
+            self.requests = TokenBucket(rpm) if rpm else None
+            self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = AdaptiveConcurrency(maximum=concurrency)
+        self.stats = LimiterStats()
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str) -> "RateLimiter":
+        defaults = PROVIDER_DEFAULTS.get(name, {"rpm": 60, "tpm": 0, "concurrency": 4})
+        prefix = f"RATE_LIMIT_{name.upper()}_"
+        return cls(
+            name=name,
+            rpm=float(os.getenv(prefix + "RPM", defaults["rpm"])),
+            tpm=float(os.getenv(prefix + "TPM", defaults["tpm"])),
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", defaults["concurrency"])),
+            enabled=os.getenv("RATE_LIMIT", "on").lower() not in ("off", "0", "false"),
+            state_path=os.getenv("RATE_LIMIT_STATE") or None
+        )
+
+    def _count(self, **increments: float) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    @contextmanager
+    def slot(self, tokens: float = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Hold one request slot for the duration of the block.
+        Set `state["throttled"] = True` inside the block when the provider answered 429.
+        """
+        state: Dict[str, Any] = {"throttled": False}
+        if not self.enabled:
+            yield state
+            return
+        waited = self.concurrency.acquire()
+        try:
+            if self.requests is not None:
+                waited += self.requests.acquire(1)
+            if self.tokens is not None and tokens:
+                waited += self.tokens.acquire(tokens)
+        except BaseException:
+            self.concurrency.release()
+            raise
+        self._count(calls=1, waited_s=waited)
+        started = time.monotonic()
+        failed = True
+        try:
+            yield state
+            failed = False
+        finally:
+            # Failures other than throttling say nothing about latency.
+            latency = None if failed and not state["throttled"] else time.monotonic() - started
+            self.concurrency.release(latency_s=latency, throttled=state["throttled"])
+
+    def call(self, fn: Callable[[], T], tokens: float = 0) -> T:
+        """
+        Run `fn` within the limits. Rate-limited and transient failures are retried
+        with jittered backoff up to `max_retries` times; only 429s shrink concurrency.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.slot(tokens) as state:
+                    try:
+                        return fn()
+                    except Exception as e:
+                        state["throttled"] = is_rate_limit_error(e)
+                        raise
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+                if not (throttled or is_transient_error(e)) or attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+                self._count(throttled=int(throttled), retries=1)
+                time.sleep(max(retry_after_s(e) or 0.0, backoff_delay(attempt)))
+                attempt += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "avg_latency_s": round(self.concurrency.avg_latency_s or 0.0, 3),
+            **self.stats.__dict__,
+            "waited_s": round(self.stats.waited_s, 3),
+        }
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Returns the process-wide limiter for provider `name`, configured from the environment."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter.from_env(name)
+        return limiter
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every limiter created in this process."""
+    with _limiters_lock:
+        return {name: limiter.snapshot() for name, limiter in _limiters.items()}
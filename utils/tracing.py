@@ -0,0 +1,276 @@
+"""
+Tracing spans and metrics for the generation pipeline.
+`span(name, **attributes)` times a block and records its attributes (token
+counts, cache hits, errors). Finished spans are appended as JSON lines to the
+trace file and aggregated into Prometheus-style metrics that can be served
+over HTTP. When tracing is disabled `span` returns a shared no-op object, so
+instrumented code pays one flag check.
+
+Configured through environment variables:
+    TRACING       "on" enables tracing (default off)
+    TRACE_FILE    JSONL file spans are appended to (default .cache/traces.jsonl, "" to skip)
+    METRICS_PORT  Serve /metrics on this port from the first process that traces
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets in seconds, from cache hits to slow image generations.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_enabled: Optional[bool] = None
+_tracer: Optional["Tracer"] = None
+_tracer_lock = threading.Lock()
+_metrics_server: Optional[threading.Thread] = None
+
+
+class _NoopSpan:
+    """Stand-in returned by `span` when tracing is off."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def fail(self, error: BaseException) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """A timed operation with attributes; nested spans record their parent."""
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.error: Optional[str] = None
+        self._token = None
+        self._started = 0.0
+        self._wall_start = 0.0
+
+    def set(self, **attributes: Any) -> None:
+        """Add or overwrite attributes, e.g. `cache_hit=True` or `prompt_tokens=812`."""
+        self.attributes.update(attributes)
+
+    def fail(self, error: BaseException) -> None:
+        """Mark the span failed for an error that is handled rather than raised."""
+        self.error = f"{type(error).__name__}: {error}"
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self._wall_start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        if exc is not None and self.error is None:
+            self.fail(exc)
+        self.tracer.finish(self, duration)
+        return False
+
+
+class Metrics:
+    """Thread-safe counters and duration histograms keyed by span name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.duration_sum: Dict[str, float] = defaultdict(float)
+        self.buckets: Dict[str, List[int]] = {}
+        self.tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.cache: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, name: str, duration: float, attributes: Dict[str, Any], error: bool) -> None:
+        with self._lock:
+            self.counts[name] += 1
+            self.duration_sum[name] += duration
+            buckets = self.buckets.setdefault(name, [0] * (len(DURATION_BUCKETS) + 1))
+            buckets[bisect_left(DURATION_BUCKETS, duration)] += 1
+            if error:
+                self.errors[name] += 1
+            for kind in ("prompt_tokens", "completion_tokens"):
+                if attributes.get(kind):
+                    self.tokens[(name, kind[:-len("_tokens")])] += int(attributes[kind])
+            if "cache_hit" in attributes:
+                self.cache[(name, "hit" if attributes["cache_hit"] else "miss")] += 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP pipeline_span_duration_seconds Duration of traced pipeline operations.",
+            "# TYPE pipeline_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for name in sorted(self.counts):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + (float("inf"),), self.buckets[name]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'pipeline_span_duration_seconds_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'pipeline_span_duration_seconds_sum{{span="{name}"}} {self.duration_sum[name]:.6f}')
+                lines.append(f'pipeline_span_duration_seconds_count{{span="{name}"}} {self.counts[name]}')
+            lines += ["# HELP pipeline_span_errors_total Traced operations that failed.",
+                      "# TYPE pipeline_span_errors_total counter"]
+            lines += [f'pipeline_span_errors_total{{span="{name}"}} {count}' for name, count in sorted(self.errors.items())]
+            lines += ["# HELP pipeline_tokens_total LLM tokens by direction, provider-reported where available.",
+                      "# TYPE pipeline_tokens_total counter"]
+            lines += [f'pipeline_tokens_total{{span="{name}",kind="{kind}"}} {count}'
+                      for (name, kind), count in sorted(self.tokens.items())]
+            lines += ["# HELP pipeline_cache_lookups_total Cache lookups by result.",
+                      "# TYPE pipeline_cache_lookups_total counter"]
+            lines += [f'pipeline_cache_lookups_total{{span="{name}",result="{result}"}} {count}'
+                      for (name, result), count in sorted(self.cache.items())]
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """Collects finished spans into `Metrics` and an optional JSONL file."""
+
+    def __init__(self, trace_file: Optional[str] = None):
+        self.metrics = Metrics()
+        self.trace_file = trace_file
+        self._file = None
+        self._file_lock = threading.Lock()
+        if trace_file:
+            directory = os.path.dirname(trace_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(trace_file, "a", encoding="utf-8")
+
+    def finish(self, span: Span, duration: float) -> None:
+        self.metrics.observe(span.name, duration, span.attributes, span.error is not None)
+        if self._file is None:
+            return
+        record = {
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": round(span._wall_start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "error": span.error,
+            "attributes": span.attributes,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._file_lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+def tracing_enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        _enabled = os.getenv("TRACING", "off").lower() in ("on", "1", "true")
+    return _enabled
+
+
+def _install_tracer(trace_file: Optional[str]) -> Tracer:
+    """Make a new tracer the process-wide one; the first also starts the metrics server if `METRICS_PORT` is set."""
+    global _tracer, _metrics_server
+    _tracer = Tracer(trace_file)
+    port = os.getenv("METRICS_PORT")
+    if port and _metrics_server is None:
+        _metrics_server = start_metrics_server(int(port))
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer, starting the metrics server if `METRICS_PORT` is set."""
+    with _tracer_lock:
+        if _tracer is None:
+            return _install_tracer(os.getenv("TRACE_FILE", os.path.join(".cache", "traces.jsonl")) or None)
+        return _tracer
+
+
+def set_tracing(enabled: bool, trace_file: Optional[str] = None) -> None:
+    """
+    Turn tracing on or off for this process, overriding `TRACING`/`TRACE_FILE`.
+    Like `get_tracer`, it starts the metrics server if `METRICS_PORT` is set.
+    """
+    global _enabled
+    with _tracer_lock:
+        _enabled = enabled
+        if enabled and trace_file is not None:
+            _install_tracer(trace_file or None)
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager timing the enclosed block as span `name`.
+    Use the returned span's `set(...)` to attach attributes known only at the end.
+    """
+    if not tracing_enabled():
+        return _NOOP
+    return Span(get_tracer(), name, attributes)
+
+
+def record_span(name: str, duration_s: float, error: Optional[str] = None, **attributes: Any) -> None:
+    """Record an already finished operation, e.g. one reported by a completion callback."""
+    if not tracing_enabled():
+        return
+    finished = Span(get_tracer(), name, attributes)
+    finished._wall_start = time.time() - duration_s
+    finished.error = error
+    finished.tracer.finish(finished, duration_s)
+
+
+def current_span():
+    """The innermost active span, or a no-op span outside of any (or with tracing off)."""
+    return _current_span.get() or _NOOP
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> Optional[threading.Thread]:
+    """Serve `/metrics` in Prometheus text format from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_tracer().metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics server not started on port %s: %s", port, e)
+        return None
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    return thread